@@ -4,9 +4,12 @@ from config import Config
 from Music.core.calls import hellmusic
 from Music.core.clients import hellbot
 from Music.core.database import db
+from Music.core.http import http_client
 from Music.core.logger import LOGS
+from Music.core.shards import shards
 from Music.core.users import user_data
 from Music.helpers.strings import TEXTS
+from Music.utils.persist import queue_store
 from Music.version import __version__
 
 
@@ -22,8 +25,12 @@ async def start_bot():
 
     await user_data.setup()
     await hellbot.start()
+    if shards.worker:
+        await shards.attach(hellbot.app)
     await hellmusic.start()
     await db.connect()
+    await http_client.start()
+    await queue_store.start()
 
     try:
         if Config.BOT_PIC:
@@ -61,6 +68,8 @@ async def start_bot():
     )
 
     await idle()
+    await queue_store.stop()
+    await db.flush()
 
     await hellbot.app.send_message(
         Config.LOGGER_ID,
@@ -69,7 +78,11 @@ async def start_bot():
     LOGS.info(
         f"\x48\x65\x6c\x6c\x2d\x4d\x75\x73\x69\x63\x20\x5b{hmusic_version}\x5d\x20\x69\x73\x20\x6e\x6f\x77\x20\x6f\x66\x66\x6c\x69\x6e\x65\x21"
     )
+    await http_client.close()
 
 
 if __name__ == "__main__":
-    hellbot.run(start_bot())
+    if shards.supervisor:
+        shards.supervise()
+    else:
+        hellbot.run(start_bot())
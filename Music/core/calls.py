@@ -1,5 +1,6 @@
 import datetime
 import os
+import time
 
 from pyrogram.enums import ChatMemberStatus
 from pyrogram.errors import (
@@ -10,30 +11,39 @@ from pyrogram.errors import (
 from pyrogram.types import InlineKeyboardMarkup
 from pytgcalls import PyTgCalls, StreamType
 from pytgcalls.exceptions import AlreadyJoinedError, NoActiveGroupCall
-from pytgcalls.types.input_stream import AudioPiped, AudioVideoPiped
+from pytgcalls.types.input_stream import (
+    AudioPiped,
+    AudioVideoPiped,
+    InputAudioStream,
+    InputStream,
+)
 from pytgcalls.types.input_stream.quality import MediumQualityAudio, MediumQualityVideo
 
 from config import Config
 from Music.helpers.buttons import Buttons
 from Music.helpers.strings import TEXTS
+from Music.utils.cache import media_cache
 from Music.utils.exceptions import (
     ChangeVCException,
     JoinGCException,
     JoinVCException,
     UserException,
 )
+from Music.utils.prefetch import prefetcher
 from Music.utils.queue import Queue
+from Music.utils.streams import streamer
 from Music.utils.thumbnail import thumb
-from Music.utils.youtube import ytube
+from Music.utils.transcode import transcoder
 
 from .clients import hellbot
 from .database import db
 from .logger import LOGS
+from .peers import peers
 
 
 async def __clean__(chat_id: int, force: bool):
     if force:
-        Queue.rm_queue(chat_id, 0)
+        Queue.advance(chat_id)
     else:
         Queue.clear_queue(chat_id)
     await db.remove_active_vc(chat_id)
@@ -41,36 +51,103 @@ async def __clean__(chat_id: int, force: bool):
 
 class HellMusic(PyTgCalls):
     def __init__(self):
-        self.music = PyTgCalls(hellbot.user)
+        # one PyTgCalls per assistant, self.music is the first one
+        self.pool = [(user, PyTgCalls(user)) for user in hellbot.assistants]
+        self.music = self.pool[0][1]
+        self.placement = {}  # chat_id -> index in pool, sticky
         self.audience = {}
 
+    def handler(self, event: str):
+        """Register a pytgcalls handler on every assistant, `@hellmusic.handler("on_stream_end")`."""
+
+        def decorator(func):
+            for _, music in self.pool:
+                getattr(music, event)()(func)
+            return func
+
+        return decorator
+
+    def _least_loaded(self) -> int:
+        loads = {user.id: 0 for user, _ in self.pool}
+        for active in db.active_vc.values():
+            if active.assistant in loads:
+                loads[active.assistant] += 1
+        counts = [loads[user.id] for user, _ in self.pool]
+        return counts.index(min(counts))
+
+    def assistant(self, chat_id: int) -> tuple:
+        """Return `(client, pytgcalls)` streaming in this chat, placing new chats on the least loaded one."""
+        index = self.placement.get(chat_id)
+        if index is None or index >= len(self.pool):
+            index = self.placement[chat_id] = self._least_loaded()
+        return self.pool[index]
+
+    def get_call(self, chat_id: int) -> PyTgCalls:
+        return self.assistant(chat_id)[1]
+
+    def assistant_name(self, user_id: int) -> str:
+        for index, (user, _) in enumerate(self.pool, start=1):
+            if user.id == user_id:
+                return f"{user.name} (#{index})"
+        return "Unknown"
+
     async def autoend(self, chat_id: int, users: list):
         autoend = await db.get_autoend()
         if autoend:
             if len(users) == 1:
-                get = await hellbot.app.get_users(users[0])
-                if get.id == hellbot.user.id:
+                if users[0] == self.assistant(chat_id)[0].id:
                     db.inactive[chat_id] = datetime.datetime.now() + datetime.timedelta(
                         minutes=5
                     )
             else:
                 db.inactive[chat_id] = {}
 
+    async def audio_stream(self, chat_id: int, file_path: str, params: str = ""):
+        """
+        Audio input for a chat. Decoded tracks are shared: a track other chats
+        are already playing is decoded once into a raw copy and every chat
+        reads that copy at its own offset, so decoding cost follows distinct
+        tracks, not chats. Only a conversion already running is waited on, up
+        to `Config.FANOUT_WAIT` seconds. Url sources (stream mode) decode per
+        chat and move to the raw copy on their next start.
+        """
+        raw = transcoder.get(file_path)
+        if raw is None and Config.FANOUT_WAIT > 0:
+            video_id = transcoder.video_id(file_path)
+            if video_id and [x for x in Queue.playing(video_id) if x != chat_id]:
+                raw = await transcoder.shared(file_path, Config.FANOUT_WAIT)
+        if raw is None:
+            return AudioPiped(
+                file_path, MediumQualityAudio(), additional_ffmpeg_parameters=params
+            )
+        if not params:
+            return InputStream(InputAudioStream(raw, transcoder.quality))
+        # seeking the raw copy, ffmpeg only copies pcm from the offset
+        return AudioPiped(
+            raw,
+            MediumQualityAudio(),
+            additional_ffmpeg_parameters=f"{transcoder.input_params} {params}",
+        )
+
     async def autoclean(self, file: str):
-        # dirty way. but works :)
-        try:
-            os.remove(file)
-            os.remove(f"downloads/{file}.webm")
-            os.remove(f"downloads/{file}.mp4")
-        except:
-            pass
+        # youtube downloads stay in the media cache for the next play,
+        # only telegram files are removed once they are done streaming
+        if file and not media_cache.is_cached(file) and os.path.isfile(file):
+            try:
+                os.remove(file)
+            except:
+                pass
+        media_cache.trim()
 
     async def start(self):
         LOGS.info(
             "\x3e\x3e\x20\x42\x6f\x6f\x74\x69\x6e\x67\x20\x50\x79\x54\x67\x43\x61\x6c\x6c\x73\x20\x43\x6c\x69\x65\x6e\x74\x2e\x2e\x2e"
         )
         if Config.HELLBOT_SESSION:
-            await self.music.start()
+            # drop assistants whose session failed to start
+            self.pool = [x for x in self.pool if x[0] in hellbot.assistants]
+            for _, music in self.pool:
+                await music.start()
             LOGS.info(
                 "\x3e\x3e\x20\x42\x6f\x6f\x74\x65\x64\x20\x50\x79\x54\x67\x43\x61\x6c\x6c\x73\x20\x43\x6c\x69\x65\x6e\x74\x21"
             )
@@ -85,25 +162,32 @@ class HellMusic(PyTgCalls):
         return pinged
 
     async def vc_participants(self, chat_id: int):
-        users = await self.music.get_participants(chat_id)
+        users = await self.get_call(chat_id).get_participants(chat_id)
         return users
 
     async def mute_vc(self, chat_id: int):
-        await self.music.mute_stream(chat_id)
+        await self.get_call(chat_id).mute_stream(chat_id)
 
     async def unmute_vc(self, chat_id: int):
-        await self.music.unmute_stream(chat_id)
+        await self.get_call(chat_id).unmute_stream(chat_id)
 
     async def pause_vc(self, chat_id: int):
-        await self.music.pause_stream(chat_id)
+        await self.get_call(chat_id).pause_stream(chat_id)
+        Queue.pause_clock(chat_id)
 
     async def resume_vc(self, chat_id: int):
-        await self.music.resume_stream(chat_id)
+        await self.get_call(chat_id).resume_stream(chat_id)
+        Queue.resume_clock(chat_id)
 
     async def leave_vc(self, chat_id: int, force: bool = False):
+        async with Queue.lock(chat_id):
+            await self._leave_vc(chat_id, force)
+
+    async def _leave_vc(self, chat_id: int, force: bool = False):
+        # for callers already holding Queue.lock(chat_id)
         try:
             await __clean__(chat_id, force)
-            await self.music.leave_group_call(chat_id)
+            await self.get_call(chat_id).leave_group_call(chat_id)
         except:
             pass
         previous = Config.PLAYER_CACHE.get(chat_id)
@@ -123,12 +207,10 @@ class HellMusic(PyTgCalls):
                 additional_ffmpeg_parameters=f"-ss {to_seek} -to {duration}",
             )
         else:
-            input_stream = AudioPiped(
-                file_path,
-                MediumQualityAudio(),
-                additional_ffmpeg_parameters=f"-ss {to_seek} -to {duration}",
+            input_stream = await self.audio_stream(
+                chat_id, file_path, f"-ss {to_seek} -to {duration}"
             )
-        await self.music.change_stream(chat_id, input_stream)
+        await self.get_call(chat_id).change_stream(chat_id, input_stream)
 
     async def invited_vc(self, chat_id: int):
         try:
@@ -144,54 +226,68 @@ class HellMusic(PyTgCalls):
                 file_path, MediumQualityAudio(), MediumQualityVideo()
             )
         else:
-            input_stream = AudioPiped(file_path, MediumQualityAudio())
-        await self.music.change_stream(chat_id, input_stream)
+            input_stream = await self.audio_stream(chat_id, file_path)
+        await self.get_call(chat_id).change_stream(chat_id, input_stream)
+        Queue.start_clock(chat_id)
 
     async def change_vc(self, chat_id: int):
+        # stream end, skip and clean all land here, one transition per chat at a time
+        async with Queue.lock(chat_id):
+            await self._change_vc(chat_id)
+
+    async def _change_vc(self, chat_id: int):
         try:
-            get = Queue.get_queue(chat_id)
-            if get == []:
-                return await self.leave_vc(chat_id)
+            if not Queue.get_current(chat_id):
+                return await self._leave_vc(chat_id)
             loop = await db.get_loop(chat_id)
             if loop == 0:
-                file = Queue.rm_queue(chat_id, 0)
+                file = Queue.advance(chat_id)
                 await self.autoclean(file)
             else:
                 await db.set_loop(chat_id, loop - 1)
         except Exception as e:
             LOGS.error(e)
-            return await self.leave_vc(chat_id)
-        get = Queue.get_queue(chat_id)
-        if get == []:
-            return await self.leave_vc(chat_id)
-        chat_id = get[0]["chat_id"]
-        duration = get[0]["duration"]
-        queue = get[0]["file"]
-        title = get[0]["title"]
-        user_id = get[0]["user_id"]
-        vc_type = get[0]["vc_type"]
-        video_id = get[0]["video_id"]
+            return await self._leave_vc(chat_id)
+        get = Queue.get_current(chat_id)
+        if not get:
+            return await self._leave_vc(chat_id)
+        chat_id = get.chat_id
+        duration = get.duration
+        queue = get.file
+        title = get.title
+        user_id = get.user_id
+        vc_type = get.vc_type
+        video_id = get.video_id
         try:
-            user = (await hellbot.app.get_users(user_id)).mention(style="md")
+            user = await peers.mention(user_id)
         except:
-            user = get[0]["user"]
+            user = get.user
         if queue:
+            started = time.monotonic()
             tg = True if video_id == "telegram" else False
             if tg:
                 to_stream = queue
             else:
-                to_stream = await ytube.download(
-                    video_id, True, True if vc_type == "video" else False
+                to_stream, mode = await streamer.source(
+                    video_id, True if vc_type == "video" else False
                 )
+            params = streamer.params(to_stream)
             if vc_type == "video":
                 input_stream = AudioVideoPiped(
-                    to_stream, MediumQualityAudio(), MediumQualityVideo()
+                    to_stream,
+                    MediumQualityAudio(),
+                    MediumQualityVideo(),
+                    additional_ffmpeg_parameters=params,
                 )
             else:
-                input_stream = AudioPiped(to_stream, MediumQualityAudio())
+                input_stream = await self.audio_stream(chat_id, to_stream, params)
             try:
-                photo = thumb.generate(video_id)
-                await self.music.change_stream(int(chat_id), input_stream)
+                photo = await thumb.generate(video_id)
+                await self.get_call(chat_id).change_stream(int(chat_id), input_stream)
+                Queue.start_clock(chat_id)
+                if not tg:
+                    streamer.record(video_id, mode, started)
+                prefetcher.sync(chat_id)
                 btns = Buttons.player_markup(
                     chat_id,
                     "None" if video_id == "telegram" else video_id,
@@ -209,7 +305,6 @@ class HellMusic(PyTgCalls):
                         ),
                         reply_markup=InlineKeyboardMarkup(btns),
                     )
-                    os.remove(photo)
                 else:
                     sent = await hellbot.app.send_message(
                         int(chat_id),
@@ -229,9 +324,8 @@ class HellMusic(PyTgCalls):
                     except:
                         pass
                 Config.PLAYER_CACHE[chat_id] = sent
-                await db.update_songs_count(1)
-                await db.update_user(user_id, "songs_played", 1)
-                chat_name = (await hellbot.app.get_chat(chat_id)).title
+                db.count_play(user_id)
+                chat_name = await peers.chat_title(chat_id)
                 await hellbot.logit(
                     f"play {vc_type}",
                     f"**⤷ Song:** `{title}` \n**⤷ Chat:** {chat_name} [`{chat_id}`] \n**⤷ User:** {user}",
@@ -239,32 +333,40 @@ class HellMusic(PyTgCalls):
             except Exception as e:
                 raise ChangeVCException(f"[ChangeVCException]: {e}")
 
-    async def join_vc(self, chat_id: int, file_path: str, video: bool = False):
+    async def join_vc(
+        self, chat_id: int, file_path: str, video: bool = False, position: int = 0
+    ):
+        # callers hold Queue.lock(chat_id) around queueing the track and joining
         # define input stream
+        params = streamer.params(file_path, f"-ss {position}" if position else "")
         if video:
             input_stream = AudioVideoPiped(
-                file_path, MediumQualityAudio(), MediumQualityVideo()
+                file_path,
+                MediumQualityAudio(),
+                MediumQualityVideo(),
+                additional_ffmpeg_parameters=params,
             )
         else:
-            input_stream = AudioPiped(file_path, MediumQualityAudio())
+            input_stream = await self.audio_stream(chat_id, file_path, params)
 
         # join vc
+        user, music = self.assistant(chat_id)
         try:
-            await self.music.join_group_call(
+            await music.join_group_call(
                 chat_id, input_stream, stream_type=StreamType().pulse_stream
             )
         except NoActiveGroupCall:
             try:
                 await self.join_gc(chat_id)
             except Exception as e:
-                await self.leave_vc(chat_id)
+                await self._leave_vc(chat_id)
                 raise JoinGCException(e)
             try:
-                await self.music.join_group_call(
+                await music.join_group_call(
                     chat_id, input_stream, stream_type=StreamType().pulse_stream
                 )
             except Exception as e:
-                await self.leave_vc(chat_id)
+                await self._leave_vc(chat_id)
                 raise JoinVCException(f"[JoinVCException]: {e}")
         except AlreadyJoinedError:
             raise UserException(
@@ -273,16 +375,20 @@ class HellMusic(PyTgCalls):
         except Exception as e:
             raise UserException(f"[UserException]: {e}")
 
-        await db.add_active_vc(chat_id, "video" if video else "voice")
+        await db.add_active_vc(chat_id, "video" if video else "voice", user.id)
+        Queue.start_clock(chat_id, position)
+        prefetcher.sync(chat_id)
         self.audience[chat_id] = {}
         users = await self.vc_participants(chat_id)
         user_ids = [user.user_id for user in users]
+        await db.update_participants(chat_id, len(user_ids))
         await self.autoend(chat_id, user_ids)
 
     async def join_gc(self, chat_id: int):
+        user = self.assistant(chat_id)[0]
         try:
             try:
-                get = await hellbot.app.get_chat_member(chat_id, hellbot.user.id)
+                get = await hellbot.app.get_chat_member(chat_id, user.id)
             except ChatAdminRequired:
                 raise UserException(
                     f"[UserException]: Bot is not admin in chat {chat_id}"
@@ -298,7 +404,7 @@ class HellMusic(PyTgCalls):
             chat = await hellbot.app.get_chat(chat_id)
             if chat.username:
                 try:
-                    await hellbot.user.join_chat(chat.username)
+                    await user.join_chat(chat.username)
                 except UserAlreadyParticipant:
                     pass
                 except Exception as e:
@@ -320,7 +426,7 @@ class HellMusic(PyTgCalls):
                     )
                     if link.startswith("https://t.me/+"):
                         link = link.replace("https://t.me/+", "https://t.me/joinchat/")
-                    await hellbot.user.join_chat(link)
+                    await user.join_chat(link)
                     await hell.edit_text("Assistant joined the chat! Enjoy your music!")
                 except UserAlreadyParticipant:
                     pass
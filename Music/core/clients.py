@@ -4,27 +4,50 @@ from config import Config
 from Music.utils.exceptions import HellBotException
 
 from .logger import LOGS
+from .shards import shards
 
 
 class HellClient(Client):
     def __init__(self):
+        # every shard worker needs its own session file, and gets its updates
+        # forwarded by the front process instead of from Telegram
         self.app = Client(
-            "HellMusic",
+            f"HellMusic{shards.index}" if shards.worker else "HellMusic",
             api_id=Config.API_ID,
             api_hash=Config.API_HASH,
             bot_token=Config.BOT_TOKEN,
             plugins=dict(root="Music.plugins"),
             workers=100,
+            no_updates=shards.worker,
         )
 
         self.user = Client(
             "HellClient",
             api_id=Config.API_ID,
             api_hash=Config.API_HASH,
-            session_string=Config.HELLBOT_SESSION,
+            session_string=shards.session(),
             no_updates=True,
         )
 
+        # assistant pool, the first one is `self.user`
+        self.assistants = [self.user]
+        if shards.worker:
+            # a shard worker streams with its own session only
+            return
+        sessions = [Config.HELLBOT_SESSION2, Config.HELLBOT_SESSION3, Config.HELLBOT_SESSION4]
+        for index, session in enumerate(sessions, start=2):
+            if not session:
+                continue
+            self.assistants.append(
+                Client(
+                    f"HellClient{index}",
+                    api_id=Config.API_ID,
+                    api_hash=Config.API_HASH,
+                    session_string=session,
+                    no_updates=True,
+                )
+            )
+
     async def start(self):
         LOGS.info("\x3e\x3e\x20\x42\x6f\x6f\x74\x69\x6e\x67\x20\x75\x70\x20\x48\x65\x6c\x6c\x4d\x75\x73\x69\x63\x2e\x2e\x2e")
         if Config.BOT_TOKEN:
@@ -36,20 +59,30 @@ class HellClient(Client):
             self.app.username = me.username
             LOGS.info(f"\x3e\x3e\x20{self.app.name}\x20\x69\x73\x20\x6f\x6e\x6c\x69\x6e\x65\x20\x6e\x6f\x77\x21")
         if Config.HELLBOT_SESSION:
-            await self.user.start()
-            me = await self.user.get_me()
-            self.user.id = me.id
-            self.user.mention = me.mention
-            self.user.name = me.first_name
-            self.user.username = me.username
-            try:
-                await self.user.join_chat("ArcBotz")
-                await self.user.join_chat("ArcUpdates")
-            except:
-                pass
-            LOGS.info(f"\x3e\x3e\x20{self.user.name}\x20\x69\x73\x20\x6f\x6e\x6c\x69\x6e\x65\x20\x6e\x6f\x77\x21")
+            await self.start_assistant(self.user)
+            for user in self.assistants[1:]:
+                try:
+                    await self.start_assistant(user)
+                except Exception as e:
+                    # a broken extra session only shrinks the pool
+                    LOGS.error(f"[Assistant] {user.name} failed to start: {e}")
+                    self.assistants.remove(user)
         LOGS.info("\x3e\x3e\x20\x42\x6f\x6f\x74\x65\x64\x20\x75\x70\x20\x48\x65\x6c\x6c\x4d\x75\x73\x69\x63\x21")
 
+    async def start_assistant(self, user: Client):
+        await user.start()
+        me = await user.get_me()
+        user.id = me.id
+        user.mention = me.mention
+        user.name = me.first_name
+        user.username = me.username
+        try:
+            await user.join_chat("ArcBotz")
+            await user.join_chat("ArcUpdates")
+        except:
+            pass
+        LOGS.info(f"\x3e\x3e\x20{user.name}\x20\x69\x73\x20\x6f\x6e\x6c\x69\x6e\x65\x20\x6e\x6f\x77\x21")
+
     async def logit(self, hash: str, log: str, file: str = None):
         log_text = f"#{hash.upper()} \n\n{log}"
         try:
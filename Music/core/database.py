@@ -1,12 +1,113 @@
+import asyncio
 import datetime
 import sys
+import zlib
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
 
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
 
 from config import Config
 
 from .logger import LOGS
 
+# collection -> [(keys, unique)], created on connect
+INDEXES = {
+    "tgusersdb": [
+        ([("user_id", ASCENDING)], True),
+        ([("songs_played", DESCENDING)], False),
+    ],
+    "chats": [([("chat_id", ASCENDING)], True)],
+    "authusers": [([("chat_id", ASCENDING), ("user_id", ASCENDING)], True)],
+    "favorites": [([("user_id", ASCENDING)], True)],
+}
+
+# membership lists: name -> (collection, document filter, array field)
+MEMBERS = {
+    "sudo": ("sudousers", {"sudo": "sudo"}, "user_ids"),
+    "blocked": ("blocked_users", {"blocked": "blocked"}, "user_ids"),
+    "gbanned": ("gban_db", {"gbanned": "gbanned"}, "user_ids"),
+    "authchats": ("authchats", {"authchats": "authchats"}, "chat_ids"),
+}
+
+
+class ActiveVC(object):
+    __slots__ = ("chat_id", "join_time", "vc_type", "assistant", "participants")
+
+    def __init__(self, chat_id: int, vc_type: str, assistant: int = 0):
+        self.chat_id = chat_id
+        self.join_time = datetime.datetime.now()
+        self.vc_type = vc_type
+        self.assistant = assistant
+        self.participants = 0
+
+
+def name_hash(name: str) -> int:
+    return zlib.crc32(str(name or "").encode())
+
+
+class KnownIds(object):
+    """
+    Compact set of telegram ids with a crc32 of their name.
+
+    Ids loaded at boot live in two sorted arrays (12 bytes per id), the ones
+    seen since then in a dict that is merged in once it grows.
+    """
+
+    def __init__(self):
+        self.ids = array("q")
+        self.names = array("I")
+        self.recent = {}
+        self.loaded = False
+
+    def load(self, pairs: list):
+        pairs.sort()
+        self.ids = array("q", [x[0] for x in pairs])
+        self.names = array("I", [x[1] for x in pairs])
+        self.loaded = True
+
+    def _index(self, key: int) -> int:
+        i = bisect_left(self.ids, key)
+        if i < len(self.ids) and self.ids[i] == key:
+            return i
+        return -1
+
+    def __contains__(self, key: int) -> bool:
+        return key in self.recent or self._index(key) >= 0
+
+    def __len__(self) -> int:
+        return len(self.ids) + len(self.recent)
+
+    def get_name(self, key: int) -> int:
+        if key in self.recent:
+            return self.recent[key]
+        i = self._index(key)
+        return self.names[i] if i >= 0 else None
+
+    def set_name(self, key: int, name: int):
+        i = self._index(key)
+        if i >= 0:
+            self.names[i] = name
+        else:
+            self.recent[key] = name
+            if len(self.recent) >= 10000:
+                self.compact()
+
+    def discard(self, key: int):
+        self.recent.pop(key, None)
+        i = self._index(key)
+        if i >= 0:
+            del self.ids[i]
+            del self.names[i]
+
+    def compact(self):
+        pairs = list(zip(self.ids, self.names)) + list(self.recent.items())
+        self.recent = {}
+        self.load(pairs)
+
 
 class Database(object):
     def __init__(self):
@@ -21,24 +122,125 @@ class Database(object):
         self.chats = self.db.chats
         self.favorites = self.db.favorites
         self.gban_db = self.db.gban_db
+        self.queues = self.db.queues
         self.songsdb = self.db.songsdb
         self.sudousers = self.db.sudousers
         self.tgusersdb = self.db.tgusersdb
 
         # local db collections
-        self.active_vc = [{"chat_id": 0, "join_time": 0, "vc_type": "voice"}]
+        self.active_vc = {}  # chat_id -> ActiveVC
         self.inactive = {}
         self.loop = {}
         self.watcher = {}
 
+        # play counters not written yet, see flush_counters
+        self.played = {}  # user_id -> songs played
+        self.songs = 0
+        self.counter_task = None
+        self.play_watchers = []
+
+        # in-memory mirror of the membership lists, loaded on first use
+        self.members = {}
+
+        # recently used favorites, user_id -> tracks
+        self.favs_cache = OrderedDict()
+
+        # every user and chat in the db, so the watchers don't query per message
+        self.known_users = KnownIds()
+        self.known_chats = KnownIds()
+        self.names = {}  # user_id -> user_name not written yet
+
+    def drop_shared(self):
+        """Forget the cached lists other shard workers may have changed."""
+        self.members.clear()
+        self.favs_cache.clear()
+
     # database connection #
     async def connect(self):
         try:
-            self.client.admin.command("ping")
+            await self.client.admin.command("ping")
             LOGS.info("\x3e\x3e\x20\x44\x61\x74\x61\x62\x61\x73\x65\x20\x63\x6f\x6e\x6e\x65\x63\x74\x69\x6f\x6e\x20\x73\x75\x63\x63\x65\x73\x73\x66\x75\x6c\x21")
         except Exception as e:
             LOGS.error(f"\x44\x61\x74\x61\x62\x61\x73\x65\x20\x63\x6f\x6e\x6e\x65\x63\x74\x69\x6f\x6e\x20\x66\x61\x69\x6c\x65\x64\x3a\x20\x27{e}\x27")
             sys.exit()
+        await self.ensure_indexes()
+        await self.load_known()
+        if self.counter_task is None:
+            self.counter_task = asyncio.ensure_future(self._counter_loop())
+
+    async def ensure_indexes(self):
+        """
+        Create the lookup indexes if missing. create_index is a no-op for an
+        existing identical index, so this runs on every boot. A unique index
+        that can't be built because of duplicate docs falls back to a plain one.
+        """
+        for name, indexes in INDEXES.items():
+            collection = self.db[name]
+            for keys, unique in indexes:
+                index_name = "_".join(f"{key}_{order}" for key, order in keys)
+                try:
+                    await collection.create_index(keys, unique=unique, name=index_name)
+                except (DuplicateKeyError, OperationFailure) as e:
+                    if not unique:
+                        LOGS.warning(f"[Database] Index {name}.{index_name} failed: {e}")
+                        continue
+                    LOGS.warning(
+                        f"[Database] {name} has duplicate {index_name} values, creating a non unique index."
+                    )
+                    try:
+                        await collection.create_index(keys, name=f"{index_name}_dup")
+                    except OperationFailure as e:
+                        LOGS.warning(f"[Database] Index {name}.{index_name} failed: {e}")
+        LOGS.info("[Database] Indexes verified.")
+
+    def query_shapes(self, user_id: int, chat_id: int) -> list:
+        # (methods, collection, filter) of every lookup the Database methods issue
+        return [
+            ("is_user_exist, get_user, update_user", self.tgusersdb, {"user_id": user_id}),
+            ("is_chat_exist, get_chat", self.chats, {"chat_id": chat_id}),
+            ("is_authuser, get_authuser", self.authusers, {"chat_id": chat_id, "user_id": user_id}),
+            ("get_all_authusers", self.authusers, {"chat_id": chat_id}),
+            ("get_favs", self.favorites, {"user_id": user_id}),
+            ("get_sudo_users", self.sudousers, {"sudo": "sudo"}),
+            ("get_blocked_users", self.blocked_users, {"blocked": "blocked"}),
+            ("get_gbanned_users", self.gban_db, {"gbanned": "gbanned"}),
+            ("get_authchats", self.authchats, {"authchats": "authchats"}),
+            ("get_autoend", self.autoend, {"autoend": "on"}),
+            ("total_songs_count", self.songsdb, {"songs": "songs"}),
+            ("queue store", self.queues, {"_id": chat_id}),
+        ]
+
+    async def explain_queries(self, user_id: int, chat_id: int) -> list:
+        """Run explain on every query shape and return the plan summaries."""
+        results = []
+        for methods, collection, query in self.query_shapes(user_id, chat_id):
+            try:
+                plan = await collection.find(query).limit(1).explain()
+            except Exception as e:
+                results.append({"methods": methods, "collection": collection.name, "error": str(e)})
+                continue
+            stages = []
+            stage = plan.get("queryPlanner", {}).get("winningPlan", {})
+            while stage:
+                stages.append(stage.get("stage", "?"))
+                stage = stage.get("inputStage") or (stage.get("inputStages") or [{}])[0]
+            stats = plan.get("executionStats", {})
+            size = await collection.estimated_document_count()
+            results.append(
+                {
+                    "methods": methods,
+                    "collection": collection.name,
+                    "stages": stages,
+                    "keys": stats.get("totalKeysExamined", 0),
+                    "docs": stats.get("totalDocsExamined", 0),
+                    "returned": stats.get("nReturned", 0),
+                    "millis": stats.get("executionTimeMillis", 0),
+                    "size": size,
+                    # a scan of a singleton settings doc is fine, one over real data is not
+                    "slow": "COLLSCAN" in stages and size > 100,
+                }
+            )
+        return results
 
     # users db #
     async def add_user(self, user_id: int, user_name: str):
@@ -48,51 +250,181 @@ class Database(object):
             "join_date": datetime.datetime.now().strftime("%d-%m-%Y %H:%M"),
             "songs_played": 0,
         }
-        await self.tgusersdb.insert_one(context)
+        try:
+            await self.tgusersdb.insert_one(context)
+        except DuplicateKeyError:
+            pass
+        self.known_users.set_name(user_id, name_hash(user_name))
 
     async def delete_user(self, user_id: int):
         await self.tgusersdb.delete_one({"user_id": user_id})
+        self.known_users.discard(user_id)
+        self.names.pop(user_id, None)
 
     async def is_user_exist(self, user_id: int) -> bool:
+        if self.known_users.loaded:
+            return user_id in self.known_users
         user = await self.tgusersdb.find_one({"user_id": user_id})
         return bool(user)
 
     async def get_user(self, user_id: int):
         user = await self.tgusersdb.find_one({"user_id": user_id})
+        if user and user_id in self.played:
+            user["songs_played"] = user.get("songs_played", 0) + self.played[user_id]
         return user
 
     async def get_all_users(self):
         users = self.tgusersdb.find({})
         return users
 
+    async def get_top_users(self, limit: int) -> list:
+        users = self.tgusersdb.find(
+            {}, {"_id": 0, "user_id": 1, "user_name": 1, "songs_played": 1}
+        )
+        return await users.sort("songs_played", DESCENDING).limit(limit).to_list(limit)
+
     async def total_users_count(self):
         count = await self.tgusersdb.count_documents({})
         return count
 
     async def update_user(self, user_id: int, key: str, value):
         if key == "songs_played":
-            prev = await self.tgusersdb.find_one({"user_id": user_id}) or {}
-            current = prev.get("songs_played", 0)
-            value = current + value
-
+            self._count(user_id, value)
+            return
+        if key == "user_name":
+            self.known_users.set_name(user_id, name_hash(value))
         await self.tgusersdb.update_one(
             {"user_id": user_id},
             {"$set": {key: value}},
             upsert=True,  # optional, but helpful so doc always exists
+        )
+
+    # known users and chats #
+    async def load_known(self):
+        users = []
+        async for x in self.tgusersdb.find({}, {"_id": 0, "user_id": 1, "user_name": 1}):
+            if isinstance(x.get("user_id"), int):
+                users.append((x["user_id"], name_hash(x.get("user_name"))))
+        chats = []
+        async for x in self.chats.find({}, {"_id": 0, "chat_id": 1}):
+            if isinstance(x.get("chat_id"), int):
+                chats.append((x["chat_id"], 0))
+        self.known_users.load(users)
+        self.known_chats.load(chats)
+        LOGS.info(f"[Database] Loaded {len(users)} users and {len(chats)} chats.")
+
+    async def seen_user(self, user_id: int, user_name: str) -> bool:
+        """Record a user talking to the bot. Returns True for a new user."""
+        if user_id not in self.known_users and not await self.is_user_exist(user_id):
+            await self.add_user(user_id, user_name)
+            return True
+        hashed = name_hash(user_name)
+        if self.known_users.get_name(user_id) != hashed:
+            # renamed, written with the next flush
+            self.known_users.set_name(user_id, hashed)
+            self.names[user_id] = user_name
+        return False
+
+    async def seen_chat(self, chat_id: int) -> bool:
+        """Record a chat the bot is in. Returns True for a new chat."""
+        if chat_id in self.known_chats or await self.is_chat_exist(chat_id):
+            return False
+        await self.add_chat(chat_id)
+        return True
+
+    async def flush_names(self):
+        names, self.names = self.names, {}
+        if not names:
+            return
+        try:
+            await self.tgusersdb.bulk_write(
+                [
+                    UpdateOne({"user_id": user_id}, {"$set": {"user_name": name}}, upsert=True)
+                    for user_id, name in names.items()
+                ],
+                ordered=False,
             )
-        
+        except Exception as e:
+            for user_id, name in names.items():
+                self.names.setdefault(user_id, name)
+            LOGS.error(f"[Database] Name flush failed: {e}")
+
+    async def flush(self):
+        await self.flush_counters()
+        await self.flush_names()
+
+    # play counters #
+    def watch_plays(self, callback):
+        """Call `callback(user_id, plays)` whenever plays are counted."""
+        self.play_watchers.append(callback)
+
+    def _count(self, user_id: int, plays: int):
+        self.played[user_id] = self.played.get(user_id, 0) + plays
+        for callback in self.play_watchers:
+            try:
+                callback(user_id, plays)
+            except:
+                pass
+
+    def count_play(self, user_id: int):
+        """Count a played track. No round trip, flushed by `flush_counters`."""
+        self._count(user_id, 1)
+        self.songs += 1
+
+    async def flush_counters(self):
+        played, self.played = self.played, {}
+        songs, self.songs = self.songs, 0
+        try:
+            if played:
+                users = list(played.items())
+                try:
+                    await self.tgusersdb.bulk_write(
+                        [
+                            UpdateOne({"user_id": user_id}, {"$inc": {"songs_played": count}}, upsert=True)
+                            for user_id, count in users
+                        ],
+                        ordered=False,
+                    )
+                    played = {}
+                except BulkWriteError as e:
+                    # the other $inc ops were applied, retrying them would count twice
+                    played = dict(users[x["index"]] for x in e.details.get("writeErrors", []))
+                    raise
+            if songs:
+                await self.songsdb.update_one(
+                    {"songs": "songs"}, {"$inc": {"count": songs}}, upsert=True
+                )
+        except Exception as e:
+            # keep what wasn't written for the next flush
+            for user_id, count in played.items():
+                self.played[user_id] = self.played.get(user_id, 0) + count
+            self.songs += songs
+            LOGS.error(f"[Database] Counter flush failed: {e}")
+
+    async def _counter_loop(self):
+        while True:
+            await asyncio.sleep(Config.COUNTER_FLUSH)
+            await self.flush()
+
     # chat db #
     async def add_chat(self, chat_id: int):
         context = {
             "chat_id": chat_id,
             "join_date": datetime.datetime.now(),
         }
-        await self.chats.insert_one(context)
+        try:
+            await self.chats.insert_one(context)
+        except DuplicateKeyError:
+            pass
+        self.known_chats.set_name(chat_id, 0)
 
     async def delete_chat(self, chat_id: int):
         await self.chats.delete_one({"chat_id": chat_id})
+        self.known_chats.discard(chat_id)
 
     async def is_chat_exist(self, chat_id: int) -> bool:
+        if self.known_chats.loaded:
+            return chat_id in self.known_chats
         chat = await self.chats.find_one({"chat_id": chat_id})
         return bool(chat)
 
@@ -110,34 +442,28 @@ class Database(object):
 
     # active vc db #
     async def get_active_vc(self) -> list:
-        return self.active_vc
+        return list(self.active_vc.values())
 
-    async def add_active_vc(self, chat_id: int, vc_type: str):
-        cid = [x["chat_id"] for x in self.active_vc]
-        if not chat_id in cid:
-            self.active_vc.append(
-                {
-                    "chat_id": chat_id,
-                    "join_time": datetime.datetime.now(),
-                    "vc_type": vc_type,
-                }
-            )
+    async def get_active_record(self, chat_id: int):
+        return self.active_vc.get(chat_id)
+
+    async def add_active_vc(self, chat_id: int, vc_type: str, assistant: int = 0):
+        if chat_id not in self.active_vc:
+            self.active_vc[chat_id] = ActiveVC(chat_id, vc_type, assistant)
 
     async def is_active_vc(self, chat_id: int) -> bool:
-        cid = [x["chat_id"] for x in self.active_vc]
-        if chat_id not in cid:
-            return False
-        else:
-            return True
+        return chat_id in self.active_vc
 
     async def remove_active_vc(self, chat_id: int):
-        for x in self.active_vc:
-            if x["chat_id"] == chat_id:
-                self.active_vc.remove(x)
+        self.active_vc.pop(chat_id, None)
+
+    async def update_participants(self, chat_id: int, count: int):
+        active = self.active_vc.get(chat_id)
+        if active:
+            active.participants = count
 
     async def total_actvc_count(self) -> int:
-        count = self.active_vc
-        return len(count) - 1
+        return len(self.active_vc)
 
     # autoend db #
     async def get_autoend(self) -> bool:
@@ -178,95 +504,81 @@ class Database(object):
             watch = False
         return watch
 
+    # membership lists #
+    async def _members(self, name: str) -> set:
+        if name not in self.members:
+            collection, query, field = MEMBERS[name]
+            doc = await self.db[collection].find_one(query)
+            self.members[name] = set(doc[field]) if doc else set()
+        return self.members[name]
+
+    async def _add_member(self, name: str, member: int):
+        members = await self._members(name)
+        collection, query, field = MEMBERS[name]
+        await self.db[collection].update_one(
+            query, {"$addToSet": {field: member}}, upsert=True
+        )
+        members.add(member)
+
+    async def _remove_member(self, name: str, member: int):
+        members = await self._members(name)
+        collection, query, field = MEMBERS[name]
+        await self.db[collection].update_one(query, {"$pull": {field: member}})
+        members.discard(member)
+
     # sudousers db #
     async def get_sudo_users(self) -> list:
-        users = await self.sudousers.find_one({"sudo": "sudo"})
-        if not users:
-            return []
-        return users["user_ids"]
+        return list(await self._members("sudo"))
 
     async def add_sudo(self, user_id: int) -> bool:
-        users = await self.get_sudo_users()
-        users.append(user_id)
-        await self.sudousers.update_one(
-            {"sudo": "sudo"}, {"$set": {"user_ids": users}}, upsert=True
-        )
+        await self._add_member("sudo", user_id)
         return True
 
     async def remove_sudo(self, user_id: int) -> bool:
-        users = await self.get_sudo_users()
-        users.remove(user_id)
-        await self.sudousers.update_one(
-            {"sudo": "sudo"}, {"$set": {"user_ids": users}}, upsert=True
-        )
+        await self._remove_member("sudo", user_id)
         return True
 
     # blocked users db #
     async def get_blocked_users(self) -> list:
-        users = await self.blocked_users.find_one({"blocked": "blocked"})
-        if not users:
-            return []
-        return users["user_ids"]
+        return list(await self._members("blocked"))
 
     async def add_blocked_user(self, user_id: int) -> bool:
-        users = await self.get_blocked_users()
-        users.append(user_id)
-        await self.blocked_users.update_one(
-            {"blocked": "blocked"}, {"$set": {"user_ids": users}}, upsert=True
-        )
+        await self._add_member("blocked", user_id)
         return True
 
     async def remove_blocked_user(self, user_id: int) -> bool:
-        users = await self.get_blocked_users()
-        users.remove(user_id)
-        await self.blocked_users.update_one(
-            {"blocked": "blocked"}, {"$set": {"user_ids": users}}, upsert=True
-        )
+        await self._remove_member("blocked", user_id)
         return True
 
     async def total_block_count(self) -> int:
-        count = await self.get_blocked_users()
-        return len(count)
+        return len(await self._members("blocked"))
 
     # gbanned users db #
     async def get_gbanned_users(self) -> list:
-        users = await self.gban_db.find_one({"gbanned": "gbanned"})
-        if not users:
-            return []
-        return users["user_ids"]
+        return list(await self._members("gbanned"))
 
     async def add_gbanned_user(self, user_id: int) -> bool:
-        users = await self.get_gbanned_users()
-        users.append(user_id)
-        await self.gban_db.update_one(
-            {"gbanned": "gbanned"}, {"$set": {"user_ids": users}}, upsert=True
-        )
+        await self._add_member("gbanned", user_id)
         return True
 
     async def remove_gbanned_users(self, user_id: int) -> bool:
-        users = await self.get_gbanned_users()
-        users.remove(user_id)
-        await self.gban_db.update_one(
-            {"gbanned": "gbanned"}, {"$set": {"user_ids": users}}, upsert=True
-        )
+        await self._remove_member("gbanned", user_id)
         return True
 
     async def is_gbanned_user(self, user_id: int) -> bool:
-        users = await self.gban_db.find_one({"gbanned": "gbanned"})
-        if users and user_id in users["user_ids"]:
-            return True
-        else:
-            return False
+        return user_id in await self._members("gbanned")
 
     async def total_gbans_count(self) -> int:
-        count = await self.get_gbanned_users()
-        return len(count)
+        return len(await self._members("gbanned"))
 
     # authusers db #
     async def add_authusers(self, chat_id: int, user_id: int, details: dict):
-        await self.authusers.insert_one(
-            {"chat_id": chat_id, "user_id": user_id, "details": details}
-        )
+        try:
+            await self.authusers.insert_one(
+                {"chat_id": chat_id, "user_id": user_id, "details": details}
+            )
+        except DuplicateKeyError:
+            pass
 
     async def is_authuser(self, chat_id: int, user_id: int) -> bool:
         chat = await self.authusers.find_one({"chat_id": chat_id, "user_id": user_id})
@@ -288,78 +600,71 @@ class Database(object):
 
     # authchats db #
     async def get_authchats(self) -> list:
-        chats = await self.authchats.find_one({"authchats": "authchats"})
-        if not chats:
-            return []
-        return chats["chat_ids"]
+        return list(await self._members("authchats"))
 
     async def add_authchat(self, chat_id: int) -> bool:
-        chats = await self.get_authchats()
-        chats.append(chat_id)
-        await self.authchats.update_one(
-            {"authchats": "authchats"}, {"$set": {"chat_ids": chats}}, upsert=True
-        )
+        await self._add_member("authchats", chat_id)
         return True
 
     async def remove_authchat(self, chat_id: int) -> bool:
-        chats = await self.get_authchats()
-        chats.remove(chat_id)
-        await self.authchats.update_one(
-            {"authchats": "authchats"}, {"$set": {"chat_ids": chats}}, upsert=True
-        )
+        await self._remove_member("authchats", chat_id)
         return True
 
     async def is_authchat(self, chat_id: int) -> bool:
-        chats = await self.authchats.find_one({"authchats": "authchats"})
-        if chats and chat_id in chats["chat_ids"]:
-            return True
-        return False
+        return chat_id in await self._members("authchats")
 
     # favorites db #
+    def _cache_favs(self, user_id: int, favs: dict):
+        self.favs_cache[user_id] = favs
+        self.favs_cache.move_to_end(user_id)
+        while len(self.favs_cache) > Config.FAVS_CACHE_SIZE:
+            self.favs_cache.popitem(last=False)
+
     async def get_favs(self, user_id: int) -> dict:
-        favs = await self.favorites.find_one({"user_id": user_id})
-        return favs["tracks"] if favs else {}
+        if user_id in self.favs_cache:
+            self.favs_cache.move_to_end(user_id)
+            return self.favs_cache[user_id]
+        favs = await self.favorites.find_one({"user_id": user_id}, {"tracks": 1})
+        favs = favs.get("tracks", {}) if favs else {}
+        self._cache_favs(user_id, favs)
+        return favs
 
     async def add_favorites(self, user_id: int, video_id: str, context: dict):
-        favs = await self.get_favs(user_id)
-        favs[video_id] = context
         await self.favorites.update_one(
-            {"user_id": user_id}, {"$set": {"tracks": favs}}, upsert=True
+            {"user_id": user_id}, {"$set": {f"tracks.{video_id}": context}}, upsert=True
         )
+        if user_id in self.favs_cache:
+            self.favs_cache[user_id][video_id] = context
 
     async def rem_favorites(self, user_id: int, video_id: str) -> bool:
-        favs = await self.get_favs(user_id)
-        if video_id in favs:
-            del favs[video_id]
-            await self.favorites.update_one(
-                {"user_id": user_id}, {"$set": {"tracks": favs}}, upsert=True
-            )
-            return True
-        return False
+        result = await self.favorites.update_one(
+            {"user_id": user_id, f"tracks.{video_id}": {"$exists": True}},
+            {"$unset": {f"tracks.{video_id}": ""}},
+        )
+        if user_id in self.favs_cache:
+            self.favs_cache[user_id].pop(video_id, None)
+        return result.modified_count > 0
+
+    async def clear_favorites(self, user_id: int):
+        await self.favorites.update_one({"user_id": user_id}, {"$set": {"tracks": {}}})
+        self.favs_cache.pop(user_id, None)
 
     async def get_all_favorites(self, user_id: int) -> list:
-        favs = []
-        for x in await self.get_favs(user_id):
-            favs.append(x)
-        return favs
+        return list(await self.get_favs(user_id))
 
     async def get_favorite(self, user_id: int, video_id: str) -> dict:
         favs = await self.get_favs(user_id)
-        return favs[video_id] if video_id in favs else {}
+        return favs.get(video_id, {})
 
     # songs db #
     async def total_songs_count(self) -> int:
         count = await self.songsdb.find_one({"songs": "songs"})
         if count:
-            return count["count"]
-        return 0
+            return count["count"] + self.songs
+        return self.songs
 
     async def update_songs_count(self, count: int):
-        songs = await self.total_songs_count()
-        songs = songs + count
-        await self.songsdb.update_one(
-            {"songs": "songs"}, {"$set": {"count": songs}}, upsert=True
-        )
+        self.songs += count
 
 
 db = Database()
@@ -0,0 +1,117 @@
+import asyncio
+import json
+
+import aiohttp
+
+from config import Config
+
+from .logger import LOGS
+
+IDEMPOTENT = ("GET", "HEAD")
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+class HttpClient:
+    """
+    One long-lived aiohttp session shared by every external HTTP call.
+    Keeps connections alive, caches DNS and retries transient failures with
+    exponential backoff.
+    """
+
+    def __init__(self):
+        self.session = None
+        self.retries = 2
+        self.backoff = 0.5
+
+    async def start(self):
+        if self.session and not self.session.closed:
+            return
+        connector = aiohttp.TCPConnector(
+            limit=Config.HTTP_POOL_SIZE,
+            limit_per_host=Config.HTTP_PER_HOST,
+            ttl_dns_cache=300,
+            keepalive_timeout=60,
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=60, sock_connect=10),
+        )
+        LOGS.info("\x3e\x3e\x20\x48\x54\x54\x50\x20\x63\x6c\x69\x65\x6e\x74\x20\x72\x65\x61\x64\x79\x21")
+
+    async def close(self):
+        if self.session and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    async def _read(self, resp: aiohttp.ClientResponse, read: str):
+        if read == "json":
+            return await resp.json(content_type=None)
+        if read == "text":
+            return await resp.text()
+        if read == "bytes":
+            return await resp.read()
+        if read == "auto":
+            text = await resp.text()
+            try:
+                return json.loads(text)
+            except ValueError:
+                return text
+        return None
+
+    async def request(
+        self, method: str, url: str, read: str = "json", retries: int = None, **kwargs
+    ):
+        """
+        Make a request and return `(status, data)`.
+        `read` is one of json, text, bytes, auto (json with text fallback) or
+        None to skip the body. GET and HEAD retry connection errors, timeouts
+        and 429/5xx answers with backoff; other methods only retry when asked
+        to with `retries`. The last error is raised.
+        """
+        await self.start()
+        if retries is None:
+            retries = self.retries if method.upper() in IDEMPOTENT else 0
+        for attempt in range(retries + 1):
+            try:
+                async with self.session.request(method, url, **kwargs) as resp:
+                    # back off after leaving the response, not holding its connection
+                    if not (resp.status in RETRY_STATUS and attempt < retries):
+                        return resp.status, await self._read(resp, read)
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if attempt >= retries:
+                    raise
+            await asyncio.sleep(self.backoff * 2**attempt)
+
+    async def get(self, url: str, read: str = "json", **kwargs):
+        return await self.request("GET", url, read, **kwargs)
+
+    async def post(self, url: str, read: str = "auto", **kwargs):
+        # not retried unless `retries` is passed, a retry may repeat the call
+        return await self.request("POST", url, read, **kwargs)
+
+    async def head(self, url: str, **kwargs) -> int:
+        status, _ = await self.request("HEAD", url, None, **kwargs)
+        return status
+
+    async def download(self, url: str, path: str, retries: int = None, **kwargs) -> bool:
+        """Stream a response body into `path`. Returns False on a non 200 answer."""
+        await self.start()
+        retries = self.retries if retries is None else retries
+        for attempt in range(retries + 1):
+            try:
+                async with self.session.get(url, **kwargs) as resp:
+                    if not (resp.status in RETRY_STATUS and attempt < retries):
+                        if resp.status != 200:
+                            return False
+                        with open(path, "wb") as f:
+                            async for chunk in resp.content.iter_chunked(65536):
+                                f.write(chunk)
+                        return True
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if attempt >= retries:
+                    raise
+            await asyncio.sleep(self.backoff * 2**attempt)
+        return False
+
+
+http_client = HttpClient()
@@ -0,0 +1,60 @@
+import time
+from collections import OrderedDict
+
+from pyrogram.types import Chat, User
+
+from config import Config
+
+from .clients import hellbot
+
+
+class PeerCache:
+    """
+    Chat titles and user mentions for cosmetic text (player, logs, /activevc).
+
+    Filled from incoming updates by the watchers and on misses from the API.
+    Entries live for `Config.PEER_CACHE_TTL` seconds, at most
+    `Config.PEER_CACHE_SIZE` of them, least recently used dropped first.
+    """
+
+    def __init__(self):
+        self.peers = OrderedDict()  # peer id -> (expires, text)
+
+    def _get(self, peer_id: int):
+        cached = self.peers.get(peer_id)
+        if cached is None or cached[0] < time.monotonic():
+            return None
+        self.peers.move_to_end(peer_id)
+        return cached[1]
+
+    def _set(self, peer_id: int, text: str):
+        self.peers[peer_id] = (time.monotonic() + Config.PEER_CACHE_TTL, text)
+        self.peers.move_to_end(peer_id)
+        while len(self.peers) > Config.PEER_CACHE_SIZE:
+            self.peers.popitem(last=False)
+
+    def remember(self, peer):
+        """Store what an update already told us about a chat or user."""
+        if isinstance(peer, User):
+            self._set(peer.id, peer.mention(style="md"))
+        elif isinstance(peer, Chat) and peer.title:
+            self._set(peer.id, peer.title)
+
+    async def chat_title(self, chat_id: int) -> str:
+        title = self._get(chat_id)
+        if title is None:
+            chat = await hellbot.app.get_chat(chat_id)
+            title = chat.title
+            self.remember(chat)
+        return title
+
+    async def mention(self, user_id: int) -> str:
+        mention = self._get(user_id)
+        if mention is None:
+            user = await hellbot.app.get_users(user_id)
+            mention = user.mention(style="md")
+            self.remember(user)
+        return mention
+
+
+peers = PeerCache()
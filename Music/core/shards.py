@@ -0,0 +1,294 @@
+import asyncio
+import hmac
+import os
+import secrets
+import signal
+import sys
+import tempfile
+import time
+from collections import deque
+from io import BytesIO
+
+from pyrogram import Client, raw, utils
+from pyrogram.handlers import RawUpdateHandler
+from pyrogram.raw.core import TLObject
+
+from config import Config
+
+from .logger import LOGS
+
+SESSIONS = ("HELLBOT_SESSION", "HELLBOT_SESSION2", "HELLBOT_SESSION3", "HELLBOT_SESSION4")
+BACKLOG = 1000  # updates kept per worker while it is (re)starting
+
+
+async def write_frame(writer: asyncio.StreamWriter, payload: bytes):
+    writer.write(len(payload).to_bytes(4, "big") + payload)
+    await writer.drain()
+
+
+async def read_frame(reader: asyncio.StreamReader) -> bytes:
+    size = int.from_bytes(await reader.readexactly(4), "big")
+    return await reader.readexactly(size)
+
+
+def pack_update(update, users: list, chats: list) -> bytes:
+    # update, then the user and chat counts and their objects, all TL serialized
+    blobs = [update.write(), len(users).to_bytes(4, "big"), len(chats).to_bytes(4, "big")]
+    blobs += [x.write() for x in users + chats]
+    return b"".join(len(x).to_bytes(4, "big") + x for x in blobs)
+
+
+def unpack_update(frame: bytes) -> tuple:
+    blobs = []
+    data = BytesIO(frame)
+    while True:
+        size = data.read(4)
+        if not size:
+            break
+        blobs.append(data.read(int.from_bytes(size, "big")))
+    users = int.from_bytes(blobs[1], "big")
+    chats = int.from_bytes(blobs[2], "big")
+    if len(blobs) != 3 + users + chats:
+        raise ValueError("malformed update frame")
+    objects = [TLObject.read(BytesIO(x)) for x in blobs[3:]]
+    return TLObject.read(BytesIO(blobs[0])), objects[:users], objects[users:]
+
+
+class Shards:
+    """
+    Splits the chats over `Config.SHARDS` worker processes.
+
+    With more than one shard `python -m Music` runs the front process: the
+    only bot token session that receives updates. It spawns one worker per
+    shard, restarts the ones that die and forwards every raw update over a
+    local socket to the worker owning its chat (`chat_id % SHARDS`).
+
+    A worker is a full bot process with its own assistant session
+    (`HELLBOT_SESSION`, `..2`, ...). Its bot client runs with `no_updates`, so
+    Telegram never hands it updates directly, and the forwarded ones are fed
+    into its dispatcher as if they came from Telegram.
+    """
+
+    def __init__(self):
+        self.count = max(1, Config.SHARDS)
+        self.index = int(os.getenv("SHARD_ID", -1))
+        # the front creates the socket in its own 0700 directory, workers get
+        # its path and the token to say hello with from the environment
+        self.socket = os.getenv("SHARD_SOCKET")
+        self.token = os.getenv("SHARD_TOKEN")
+        # front process
+        self.front = None
+        self.links = {}  # shard index -> StreamWriter
+        self.backlog = {}  # shard index -> deque of frames
+        self.processes = {}  # shard index -> subprocess
+        self.delays = {}  # shard index -> seconds to wait before the next respawn
+        self.stopping = None
+        self.restarting = False
+        self.stats = {"forwarded": 0, "dropped": 0}
+        # worker process
+        self.app = None
+
+    @property
+    def supervisor(self) -> bool:
+        return self.count > 1 and self.index < 0
+
+    @property
+    def worker(self) -> bool:
+        return self.count > 1 and self.index >= 0
+
+    @property
+    def main(self) -> bool:
+        """True in the process that runs the global jobs, like the leaderboard broadcast."""
+        return self.index <= 0
+
+    def session(self) -> str:
+        return getattr(Config, SESSIONS[self.index]) if self.worker else Config.HELLBOT_SESSION
+
+    def owner(self, chat_id: int) -> int:
+        return chat_id % self.count
+
+    def owns(self, chat_id: int) -> bool:
+        if not self.worker:
+            return True
+        return self.owner(chat_id) == self.index
+
+    # front #
+    def chat_id(self, update):
+        # chat of a raw update, None for chatless ones (inline queries)
+        peer = getattr(update, "peer", None)
+        if peer is None:
+            peer = getattr(getattr(update, "message", None), "peer_id", None)
+        if isinstance(peer, (raw.types.PeerUser, raw.types.PeerChat, raw.types.PeerChannel)):
+            return utils.get_peer_id(peer)
+        if getattr(update, "channel_id", None):
+            return utils.get_channel_id(update.channel_id)
+        if getattr(update, "chat_id", None):
+            return -update.chat_id
+        return None
+
+    async def _forward(self, _, update, users: dict, chats: dict):
+        chat_id = self.chat_id(update)
+        index = 0 if chat_id is None else self.owner(chat_id)
+        frame = pack_update(update, list(users.values()), list(chats.values()))
+        writer = self.links.get(index)
+        if writer is not None:
+            try:
+                await write_frame(writer, frame)
+                self.stats["forwarded"] += 1
+                return
+            except (ConnectionError, OSError):
+                self.links.pop(index, None)
+        backlog = self.backlog.setdefault(index, deque(maxlen=BACKLOG))
+        if len(backlog) == backlog.maxlen:
+            self.stats["dropped"] += 1
+        backlog.append(frame)
+
+    async def _connected(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            token, index = (await read_frame(reader)).decode().split(":")
+            if not hmac.compare_digest(token, self.token):
+                raise ValueError("bad shard token")
+            index = int(index)
+            # updates forwarded during the replay queue up behind it, the link is
+            # published only once the backlog is empty, with no await in between
+            while self.backlog.get(index):
+                await write_frame(writer, self.backlog[index].popleft())
+        except (asyncio.IncompleteReadError, ConnectionError, OSError, UnicodeDecodeError, ValueError):
+            writer.close()
+            return
+        self.links[index] = writer
+        LOGS.info(f"[Shards] Worker {index} connected.")
+        try:
+            # workers never write after the hello, this only waits for the disconnect
+            await reader.read()
+        except (ConnectionError, OSError):
+            pass
+        if self.links.get(index) is writer:
+            del self.links[index]
+        writer.close()
+
+    async def _spawn(self, index: int):
+        env = dict(os.environ, SHARD_ID=str(index), SHARD_SOCKET=self.socket, SHARD_TOKEN=self.token)
+        process = await asyncio.create_subprocess_exec(sys.executable, "-m", "Music", env=env)
+        self.processes[index] = process
+        LOGS.info(f"[Shards] Worker {index} started (pid {process.pid}).")
+        asyncio.ensure_future(self._watch(index, process, time.monotonic()))
+
+    async def _watch(self, index: int, process, started: float):
+        code = await process.wait()
+        if self.stopping.is_set() or self.restarting or self.processes.get(index) is not process:
+            return
+        # back off when a worker keeps dying right after boot
+        delay = self.delays.get(index, 0)
+        delay = min(60, delay * 2 or 5) if time.monotonic() - started < 60 else 0
+        self.delays[index] = delay
+        LOGS.warning(f"[Shards] Worker {index} exited ({code}), respawning in {delay}s.")
+        await asyncio.sleep(delay)
+        if not self.stopping.is_set():
+            await self._spawn(index)
+
+    async def _stop_workers(self):
+        processes = [x for x in self.processes.values() if x.returncode is None]
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            try:
+                await asyncio.wait_for(process.wait(), 30)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+        self.processes.clear()
+
+    async def _restart(self):
+        # /restart in any worker restarts all of them
+        if self.restarting:
+            return
+        self.restarting = True
+        LOGS.info("[Shards] Restarting all workers.")
+        await self._stop_workers()
+        self.restarting = False
+        for index in range(self.count):
+            await self._spawn(index)
+
+    async def _run_front(self):
+        self.stopping = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        loop.add_signal_handler(signal.SIGTERM, self.stopping.set)
+        loop.add_signal_handler(signal.SIGINT, self.stopping.set)
+        loop.add_signal_handler(signal.SIGHUP, lambda: asyncio.ensure_future(self._restart()))
+
+        folder = tempfile.mkdtemp(prefix="hellmusic-")
+        self.socket = os.path.join(folder, "shards.sock")
+        self.token = secrets.token_hex(16)
+        server = await asyncio.start_unix_server(self._connected, path=self.socket)
+        self.front = Client(
+            "HellMusic",
+            api_id=Config.API_ID,
+            api_hash=Config.API_HASH,
+            bot_token=Config.BOT_TOKEN,
+            workers=4,
+        )
+        self.front.add_handler(RawUpdateHandler(self._forward))
+        await self.front.start()
+        # only raw updates are forwarded, skip building the high level objects
+        self.front.dispatcher.update_parsers = {}
+        LOGS.info(f"[Shards] Front started, forwarding to {self.count} workers.")
+        for index in range(self.count):
+            await self._spawn(index)
+
+        await self.stopping.wait()
+        LOGS.info("[Shards] Stopping workers.")
+        await self._stop_workers()
+        await self.front.stop()
+        server.close()
+        try:
+            os.remove(self.socket)
+            os.rmdir(folder)
+        except OSError:
+            pass
+
+    def supervise(self):
+        missing = [x for x in SESSIONS[: self.count] if not getattr(Config, x)]
+        if self.count > len(SESSIONS) or missing:
+            LOGS.error(
+                f"[Shards] {self.count} shards need {self.count} assistant sessions, set {', '.join(SESSIONS[: self.count])}."
+            )
+            quit(1)
+        asyncio.run(self._run_front())
+
+    # worker #
+    async def attach(self, app: Client):
+        """Feed the updates the front forwards into this worker's dispatcher."""
+        self.app = app
+        dispatcher = app.dispatcher
+        # no_updates clients don't start their handler tasks
+        if not dispatcher.handler_worker_tasks:
+            for _ in range(app.workers):
+                lock = asyncio.Lock()
+                dispatcher.locks_list.append(lock)
+                dispatcher.handler_worker_tasks.append(
+                    asyncio.ensure_future(dispatcher.handler_worker(lock))
+                )
+        asyncio.ensure_future(self._receive())
+
+    async def _receive(self):
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.socket)
+                await write_frame(writer, f"{self.token}:{self.index}".encode())
+                LOGS.info(f"[Shards] Worker {self.index} attached to the front.")
+                while True:
+                    update, users, chats = unpack_update(await read_frame(reader))
+                    # the front resolved these peers, this session needs their access hashes too
+                    await self.app.fetch_peers(users)
+                    await self.app.fetch_peers(chats)
+                    self.app.dispatcher.updates_queue.put_nowait(
+                        (update, {x.id: x for x in users}, {x.id: x for x in chats})
+                    )
+            except Exception as e:
+                # a frame that doesn't parse drops the connection too
+                LOGS.warning(f"[Shards] Lost the front ({e}), reconnecting.")
+                await asyncio.sleep(1)
+
+
+shards = Shards()
@@ -1,7 +1,10 @@
+import asyncio
+
 from config import Config
 
 from .database import db
 from .logger import LOGS
+from .shards import shards
 
 
 class UsersData:
@@ -59,6 +62,27 @@ class UsersData:
         await self.god_users()
         await self.sudo_users()
         await self.banned_users()
+        if shards.worker:
+            asyncio.ensure_future(self.shard_sync())
+
+    def _replace(self, users, new: set):
+        for x in set(users) - new:
+            users.remove(x)
+        for x in new - set(users):
+            users.add(x)
+
+    async def shard_sync(self):
+        # sudo, block and gban commands run in whichever worker owns the chat
+        while True:
+            await asyncio.sleep(Config.SHARD_SYNC)
+            try:
+                db.drop_shared()
+                sudos = set(await db.get_sudo_users()) | set(self.DEVS) | set(Config.GOD_USERS)
+                banned = set(await db.get_blocked_users()) | set(await db.get_gbanned_users())
+                self._replace(Config.SUDO_USERS, sudos)
+                self._replace(Config.BANNED_USERS, banned)
+            except Exception as e:
+                LOGS.warning(f"[Shards] Sync failed: {e}")
 
 
 user_data = UsersData()
@@ -4,12 +4,12 @@ import re
 import string
 import time
 
-import aiohttp
 import psutil
 import pytz
 from html_telegraph_poster import TelegraphPoster
 
 from config import Config
+from Music.core.http import http_client
 from Music.version import __start_time__
 
 
@@ -122,14 +122,9 @@ class Formatters:
         )
         return self.convert_telegraph_url(post_page["url"])
 
-    async def post(self, url: str, *args, **kwargs):
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, *args, **kwargs) as resp:
-                try:
-                    data = await resp.json()
-                except Exception:
-                    data = await resp.text()
-            return data
+    async def post(self, url: str, **kwargs):
+        _, data = await http_client.post(url, **kwargs)
+        return data
 
     async def bb_paste(self, text):
         BASE = "https://batbin.me/"
@@ -151,6 +151,10 @@ class TEXTS:
         "    __Block or unblock user from using the bot.__\n\n"
         "**» /blocklist**\n"
         "    __List all blocked users.__\n\n"
+        "**» /dbexplain**\n"
+        "    __Explain every database query shape and flag collection scans.__\n\n"
+        "**» /dlstats**\n"
+        "    __Show download and media cache stats.__\n\n"
         "**» /gban ; /ungban**\n"
         "    __Globally ban or unban user from using the bot.__\n\n"
         "**» /gbanlist**\n"
@@ -9,6 +9,7 @@ from Music.core.clients import hellbot
 from Music.core.database import db
 from Music.core.decorators import check_mode
 from Music.core.logger import LOGS
+from Music.core.peers import peers
 from Music.helpers.formatters import formatter
 from Music.utils.pages import MakePages
 from Music.utils.queue import Queue
@@ -21,20 +22,17 @@ async def activevc(_, message: Message):
     active_chats = await db.get_active_vc()
     collection = []
     for x in active_chats:
-        cid = int(x["chat_id"])
-        if cid == 0:
-            continue
-        joined = x["join_time"]
-        vc_type = x["vc_type"]
-        participants = len(await hellmusic.vc_participants(cid))
+        cid = int(x.chat_id)
+        joined = x.join_time
+        vc_type = x.vc_type
+        participants = x.participants
         try:
-            check = Queue.get_queue(cid)
-            song = check[0]["title"]
+            song = Queue.get_current(cid).title
         except Exception as e:
             LOGS.error(e)
             song = "Unknown"
         try:
-            title = (await hellbot.app.get_chat(cid)).title
+            title = await peers.chat_title(cid)
         except Exception:
             title = "Private Group"
         active_since = datetime.datetime.now() - joined
@@ -44,10 +42,11 @@ async def activevc(_, message: Message):
         context = {
             "chat_id": cid,
             "title": title,
-            "participants": participants - 1,
+            "participants": max(0, participants - 1),
             "active_since": f"{_hours} hrs, {_minutes} mins.",
             "playing": song,
             "vc_type": vc_type,
+            "assistant": hellmusic.assistant_name(x.assistant),
         }
         collection.append(context)
     if len(collection) == 0:
@@ -63,20 +62,17 @@ async def activevc_cb(_, cb: CallbackQuery):
     collection = []
     active_chats = await db.get_active_vc()
     for x in active_chats:
-        cid = int(x["chat_id"])
-        if cid == 0:
-            continue
-        joined = x["join_time"]
-        vc_type = x["vc_type"]
-        participants = len(await hellmusic.vc_participants(cid))
+        cid = int(x.chat_id)
+        joined = x.join_time
+        vc_type = x.vc_type
+        participants = x.participants
         try:
-            check = Queue.get_queue(cid)
-            song = check[0]["title"]
+            song = Queue.get_current(cid).title
         except Exception as e:
             LOGS.error(e)
             song = "Unknown"
         try:
-            title = (await hellbot.app.get_chat(cid)).title
+            title = await peers.chat_title(cid)
         except Exception:
             title = "Private Group"
         active_since = datetime.datetime.now() - joined
@@ -86,10 +82,11 @@ async def activevc_cb(_, cb: CallbackQuery):
         context = {
             "chat_id": cid,
             "title": title,
-            "participants": participants - 1,
+            "participants": max(0, participants - 1),
             "active_since": f"{_hours} hrs, {_minutes} mins.",
             "playing": song,
             "vc_type": vc_type,
+            "assistant": hellmusic.assistant_name(x.assistant),
         }
         collection.append(context)
     last_page, _ = formatter.group_the_list(collection, length=True)
@@ -8,6 +8,7 @@ from Music.core.clients import hellbot
 from Music.core.database import db
 from Music.core.decorators import AdminWrapper, check_mode
 from Music.helpers.formatters import formatter
+from Music.utils.admins import admin_cache
 from Music.utils.pages import MakePages
 
 
@@ -38,6 +39,7 @@ async def auth(_, message: Message):
                 "auth_date": datetime.datetime.now().strftime("%d-%m-%Y %H:%M"),
             }
             await db.add_authusers(message.chat.id, user.id, context)
+            admin_cache.add_auth(message.chat.id, user.id)
             await message.reply_text("Successfully Authorized user in this chat!")
         else:
             await message.reply_text("This user is already Authorized in this chat!")
@@ -58,6 +60,7 @@ async def auth(_, message: Message):
                 "auth_date": datetime.datetime.now().strftime("%d-%m-%Y %H:%M"),
             }
             await db.add_authusers(message.chat.id, user.id, context)
+            admin_cache.add_auth(message.chat.id, user.id)
             await message.reply_text("Successfully Authorized user in this chat!")
         else:
             await message.reply_text("This user is already Authorized in this chat!")
@@ -80,6 +83,7 @@ async def unauth(_, message: Message):
         is_auth = await db.is_authuser(message.chat.id, user.id)
         if is_auth:
             await db.remove_authuser(message.chat.id, user.id)
+            admin_cache.remove_auth(message.chat.id, user.id)
             await message.reply_text("Removed user's Authorization in this chat!")
         else:
             await message.reply_text("This user was not Authorized in this chat!")
@@ -88,6 +92,7 @@ async def unauth(_, message: Message):
         is_auth = await db.is_authuser(message.chat.id, user.id)
         if is_auth:
             await db.remove_authuser(message.chat.id, user.id)
+            admin_cache.remove_auth(message.chat.id, user.id)
             await message.reply_text("Removed user's Authorization in this chat!")
         else:
             await message.reply_text("This user was not Authorized in this chat!")
@@ -124,19 +124,19 @@ async def controler_cb(_, cb: CallbackQuery):
         )
     elif action == "replay":
         hell = await cb.message.reply_text("Processing ...")
-        que = Queue.get_queue(cb.message.chat.id)
-        if que == []:
+        que = Queue.get_current(cb.message.chat.id)
+        if not que:
             await hell.delete()
             return await cb.answer("No songs in queue to replay!", show_alert=True)
         await cb.answer("Replaying!", show_alert=True)
         await player.replay(cb.message.chat.id, hell)
     elif action == "skip":
         hell = await cb.message.reply_text("Processing ...")
-        que = Queue.get_queue(cb.message.chat.id)
-        if que == []:
+        que = Queue.get_current(cb.message.chat.id)
+        if not que:
             await hell.delete()
             return await cb.answer("No songs in queue to skip!", show_alert=True)
-        if len(que) == 1:
+        if Queue.length(cb.message.chat.id) == 1:
             await hell.delete()
             return await cb.answer(
                 "No more songs in queue to skip! Use /end or /stop to stop the VC.",
@@ -147,65 +147,72 @@ async def controler_cb(_, cb: CallbackQuery):
             await db.set_loop(cb.message.chat.id, 0)
         await player.skip(cb.message.chat.id, hell)
     elif action == "bseek":
-        que = Queue.get_queue(cb.message.chat.id)
-        if que == []:
-            return await cb.answer("No songs in queue to seek!", show_alert=True)
-        played = int(que[0]["played"])
-        seek_time = 10
-        if (played - seek_time) <= 10:
-            return await cb.answer("Cannot seek beyond 10 seconds!", show_alert=True)
-        to_seek = played - seek_time
-        video = True if que[0]["vc_type"] == "video" else False
-        if que[0]["file"] == que[0]["video_id"]:
-            file_path = await ytube.download(que[0]["video_id"], True, video)
-        else:
-            file_path = que[0]["file"]
-        try:
-            context = {
-                "chat_id": que[0]["chat_id"],
-                "file": file_path,
-                "duration": que[0]["duration"],
-                "seek": formatter.secs_to_mins(to_seek),
-                "video": video,
-            }
-            await hellmusic.seek_vc(context)
-        except:
-            return await cb.answer("Something went wrong!", show_alert=True)
-        Queue.update_duration(cb.message.chat.id, 0, to_seek)
+        async with Queue.lock(cb.message.chat.id):
+            que = Queue.get_current(cb.message.chat.id)
+            if not que:
+                return await cb.answer("No songs in queue to seek!", show_alert=True)
+            played = Queue.get_played(cb.message.chat.id)
+            seek_time = 10
+            if (played - seek_time) <= 10:
+                return await cb.answer("Cannot seek beyond 10 seconds!", show_alert=True)
+            to_seek = played - seek_time
+            video = True if que.vc_type == "video" else False
+            if que.file == que.video_id:
+                file_path = await ytube.download(que.video_id, True, video)
+            else:
+                file_path = que.file
+            try:
+                context = {
+                    "chat_id": que.chat_id,
+                    "file": file_path,
+                    "duration": que.duration,
+                    "seek": formatter.secs_to_mins(to_seek),
+                    "video": video,
+                }
+                await hellmusic.seek_vc(context)
+            except:
+                return await cb.answer("Something went wrong!", show_alert=True)
+            Queue.set_position(cb.message.chat.id, to_seek)
         await cb.message.reply_text(
             f"__Seeked back by {seek_time} seconds!__ \n\nBy: {cb.from_user.mention}"
         )
     elif action == "fseek":
-        que = Queue.get_queue(cb.message.chat.id)
-        if que == []:
-            return await cb.answer("No songs in queue to seek!", show_alert=True)
-        played = int(que[0]["played"])
-        duration = formatter.mins_to_secs(que[0]["duration"])
-        seek_time = 10
-        if (duration - (played + seek_time)) <= 10:
-            return await cb.answer("Cannot seek beyond 10 seconds!", show_alert=True)
-        to_seek = played + seek_time
-        try:
-            context = {
-                "chat_id": que[0]["chat_id"],
-                "file": que[0]["file"],
-                "duration": que[0]["duration"],
-                "seek": formatter.secs_to_mins(to_seek),
-                "video": True if que[0]["vc_type"] == "video" else False,
-            }
-            await hellmusic.seek_vc(context)
-        except:
-            return await cb.answer("Something went wrong!", show_alert=True)
-        Queue.update_duration(cb.message.chat.id, 1, to_seek)
+        async with Queue.lock(cb.message.chat.id):
+            que = Queue.get_current(cb.message.chat.id)
+            if not que:
+                return await cb.answer("No songs in queue to seek!", show_alert=True)
+            played = Queue.get_played(cb.message.chat.id)
+            duration = formatter.mins_to_secs(que.duration)
+            seek_time = 10
+            if (duration - (played + seek_time)) <= 10:
+                return await cb.answer("Cannot seek beyond 10 seconds!", show_alert=True)
+            to_seek = played + seek_time
+            video = True if que.vc_type == "video" else False
+            if que.file == que.video_id:
+                file_path = await ytube.download(que.video_id, True, video)
+            else:
+                file_path = que.file
+            try:
+                context = {
+                    "chat_id": que.chat_id,
+                    "file": file_path,
+                    "duration": que.duration,
+                    "seek": formatter.secs_to_mins(to_seek),
+                    "video": video,
+                }
+                await hellmusic.seek_vc(context)
+            except:
+                return await cb.answer("Something went wrong!", show_alert=True)
+            Queue.set_position(cb.message.chat.id, to_seek)
         await cb.message.reply_text(
             f"__Seeked forward by {seek_time} seconds!__ \n\nBy: {cb.from_user.mention}"
         )
     elif action == "back":
-        que = Queue.get_queue(cb.message.chat.id)
-        if que == []:
+        que = Queue.get_current(cb.message.chat.id)
+        if not que:
             video_id = "telegram"
         else:
-            video_id = que[0]["video_id"]
+            video_id = que.video_id
         btns = Buttons.player_markup(cb.message.chat.id, video_id, hellbot.app.username)
         try:
             await cb.message.edit_reply_markup(InlineKeyboardMarkup(btns))
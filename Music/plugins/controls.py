@@ -122,8 +122,8 @@ async def replay(_, message: Message):
     if not is_active:
         return await message.reply_text("No active Voice Chat found here!")
     hell = await message.reply_text("Replaying...")
-    que = Queue.get_queue(message.chat.id)
-    if que == []:
+    que = Queue.get_current(message.chat.id)
+    if not que:
         return await hell.edit("No songs in the queue to replay!")
     await player.replay(message.chat.id, hell)
 
@@ -136,10 +136,10 @@ async def skip(_, message: Message):
     if not is_active:
         return await message.reply_text("No active Voice Chat found here!")
     hell = await message.reply_text("Processing ...")
-    que = Queue.get_queue(message.chat.id)
-    if que == []:
+    que = Queue.get_current(message.chat.id)
+    if not que:
         return await hell.edit("No songs in the queue to skip!")
-    if len(que) == 1:
+    if Queue.length(message.chat.id) == 1:
         return await hell.edit_text(
             "No more songs in queue to skip! Use /end or /stop to stop the VC."
         )
@@ -171,40 +171,41 @@ async def seek(_, message: Message):
             seek_type = 1  # forward
     except:
         return await hell.edit_text("Please enter numeric characters only!")
-    que = Queue.get_queue(message.chat.id)
-    if que == []:
-        return await hell.edit_text("No songs in the queue to seek!")
-    played = int(que[0]["played"])
-    duration = formatter.mins_to_secs(que[0]["duration"])
-    if seek_type == 0:
-        if (played - seek_time) <= 10:
-            return await hell.edit_text(
-                "Cannot seek when only 10 seconds are left! Use a lesser value."
-            )
-        to_seek = played - seek_time
-    else:
-        if (duration - (played + seek_time)) <= 10:
-            return await hell.edit_text(
-                "Cannot seek when only 10 seconds are left! Use a lesser value."
-            )
-        to_seek = played + seek_time
-    video = True if que[0]["vc_type"] == "video" else False
-    if que[0]["file"] == que[0]["video_id"]:
-        file_path = await ytube.download(que[0]["video_id"], True, video)
-    else:
-        file_path = que[0]["file"]
-    try:
-        context = {
-            "chat_id": que[0]["chat_id"],
-            "file": file_path,
-            "duration": que[0]["duration"],
-            "seek": formatter.secs_to_mins(to_seek),
-            "video": video,
-        }
-        await hellmusic.seek_vc(context)
-    except:
-        return await hell.edit_text("Something went wrong!")
-    Queue.update_duration(message.chat.id, seek_type, seek_time)
+    async with Queue.lock(message.chat.id):
+        que = Queue.get_current(message.chat.id)
+        if not que:
+            return await hell.edit_text("No songs in the queue to seek!")
+        played = Queue.get_played(message.chat.id)
+        duration = formatter.mins_to_secs(que.duration)
+        if seek_type == 0:
+            if (played - seek_time) <= 10:
+                return await hell.edit_text(
+                    "Cannot seek when only 10 seconds are left! Use a lesser value."
+                )
+            to_seek = played - seek_time
+        else:
+            if (duration - (played + seek_time)) <= 10:
+                return await hell.edit_text(
+                    "Cannot seek when only 10 seconds are left! Use a lesser value."
+                )
+            to_seek = played + seek_time
+        video = True if que.vc_type == "video" else False
+        if que.file == que.video_id:
+            file_path = await ytube.download(que.video_id, True, video)
+        else:
+            file_path = que.file
+        try:
+            context = {
+                "chat_id": que.chat_id,
+                "file": file_path,
+                "duration": que.duration,
+                "seek": formatter.secs_to_mins(to_seek),
+                "video": video,
+            }
+            await hellmusic.seek_vc(context)
+        except:
+            return await hell.edit_text("Something went wrong!")
+        Queue.set_position(message.chat.id, to_seek)
     await hell.edit_text(
         f"Seeked `{seek_time}` seconds {'forward' if seek_type == 1 else 'backward'}!"
     )
@@ -104,10 +104,8 @@ async def delfavs_cb(_, cb: CallbackQuery):
     _, action, user_id = cb.data.split("|")
     if int(user_id) != cb.from_user.id:
         return await cb.answer("This is not for you!", show_alert=True)
-    collection = await db.get_all_favorites(int(user_id))
     if action == "all":
-        for i in collection:
-            await db.rem_favorites(int(user_id), i["video_id"])
+        await db.clear_favorites(int(user_id))
         return await cb.message.edit_text("Deleted all your favorites!")
     else:
         is_deleted = await db.rem_favorites(int(user_id), action)
@@ -131,7 +129,9 @@ async def favsplay_cb(_, cb: CallbackQuery):
         return await cb.answer("Closed!", show_alert=True)
     else:
         await cb.message.edit_text("Playing your favorites")
-        all_tracks = await db.get_all_favorites(int(user_id))
+        # saved titles and durations spare a search per track
+        favs = await db.get_favs(int(user_id))
+        all_tracks = [{"id": video_id, **details} for video_id, details in favs.items()]
         random.shuffle(all_tracks)
         video = True if action == "video" else False
         context = {
@@ -11,6 +11,7 @@ from Music.core.decorators import AuthWrapper, PlayWrapper, UserWrapper, check_m
 from Music.helpers.buttons import Buttons
 from Music.helpers.formatters import formatter
 from Music.helpers.strings import TEXTS
+from Music.utils.admins import admin_cache
 from Music.utils.pages import MakePages
 from Music.utils.play import player
 from Music.utils.queue import Queue
@@ -28,13 +29,7 @@ from Music.utils.youtube import ytube
 async def play_music(_, message: Message, context: dict):
     user_name = message.from_user.first_name
     user_id = message.from_user.id
-    if not await db.is_user_exist(user_id):
-        await db.add_user(user_id, user_name)
-    else:
-        try:
-            await db.update_user(user_id, "user_name", user_name)
-        except:
-            pass
+    await db.seen_user(user_id, user_name)
     hell = await message.reply_text("Processing ...")
     # initialise variables
     video, force, url, tgaud, tgvid = context.values()
@@ -177,13 +172,14 @@ async def playing(_, message: Message):
     que = Queue.get_current(chat_id)
     if not que:
         return await message.reply_text("Nothing is playing here.")
-    photo = thumb.generate(que["video_id"])
-    btns = Buttons.player_markup(chat_id, que["video_id"], hellbot.app.username)
+    photo = await thumb.generate(que.video_id)
+    btns = Buttons.player_markup(chat_id, que.video_id, hellbot.app.username)
+    played = formatter.secs_to_mins(Queue.get_played(chat_id))
     to_send = TEXTS.PLAYING.format(
         hellbot.app.mention,
-        que["title"],
-        que["duration"],
-        que["user"],
+        que.title,
+        f"{played} / {que.duration}",
+        que.user,
     )
     if photo:
         sent = await message.reply_photo(
@@ -221,7 +217,9 @@ async def queued_tracks(_, message: Message):
 @hellbot.app.on_message(filters.command(["clean", "reload"]) & ~Config.BANNED_USERS)
 @AuthWrapper
 async def clean_queue(_, message: Message):
-    Queue.clear_queue(message.chat.id)
+    async with Queue.lock(message.chat.id):
+        Queue.clear_queue(message.chat.id)
+    admin_cache.invalidate(message.chat.id, True)
     hell = await message.reply_text("**Cleared Queue.**")
     await asyncio.sleep(10)
     await hell.delete()
@@ -1,6 +1,6 @@
 import asyncio
 import os
-import shutil
+import signal
 
 from pyrogram import filters
 from pyrogram.errors import FloodWait
@@ -11,9 +11,18 @@ from Music.core.calls import hellmusic
 from Music.core.clients import hellbot
 from Music.core.database import db
 from Music.core.decorators import UserWrapper
+from Music.core.shards import shards
 from Music.core.users import user_data
 from Music.helpers.broadcast import Gcast
 from Music.helpers.formatters import formatter
+from Music.utils.cache import media_cache
+from Music.utils.persist import queue_store
+from Music.utils.prefetch import prefetcher
+from Music.utils.search import search_cache
+from Music.utils.streams import streamer
+from Music.utils.transcode import transcoder
+from Music.utils.workers import ytdlp_pool
+from Music.utils.youtube import format_download_stats
 
 
 @hellbot.app.on_message(filters.command("autoend") & Config.SUDO_USERS)
@@ -207,14 +216,54 @@ async def log_(_, message: Message):
         await message.reply_text(f"**ERROR:** \n\n`{e}`")
 
 
+@hellbot.app.on_message(filters.command("dlstats") & Config.SUDO_USERS)
+@UserWrapper
+async def download_stats(_, message: Message):
+    stats = [
+        format_download_stats(),
+        media_cache.format_stats(),
+        transcoder.format_stats(),
+        ytdlp_pool.format_stats(),
+        prefetcher.format_stats(),
+        search_cache.format_stats(),
+        streamer.format_stats(),
+    ]
+    await message.reply_text("\n\n".join(stats))
+
+
+@hellbot.app.on_message(filters.command("dbexplain") & Config.SUDO_USERS)
+@UserWrapper
+async def db_explain(_, message: Message):
+    hell = await message.reply_text("Explaining database queries...")
+    results = await db.explain_queries(message.from_user.id, message.chat.id)
+    text = "**🔎 Query Shapes**\n\n"
+    slow = 0
+    for x in results:
+        if "error" in x:
+            text += f"**❌ {x['collection']}:** `{x['methods']}`\n    __{x['error']}__\n\n"
+            continue
+        slow += 1 if x["slow"] else 0
+        text += (
+            f"**{'⚠️' if x['slow'] else '✅'} {x['collection']}:** `{x['methods']}`\n"
+            f"    **Plan:** `{' > '.join(x['stages'])}`\n"
+            f"    **Keys:** `{x['keys']}` | **Docs:** `{x['docs']}/{x['size']}` "
+            f"| **Time:** `{x['millis']}ms`\n\n"
+        )
+    text += f"**Slow Shapes:** `{slow}`"
+    await hell.edit_text(text)
+
+
 @hellbot.app.on_message(filters.command("restart") & Config.SUDO_USERS)
 @UserWrapper
 async def restart_(_, message: Message):
     hell = await message.reply_text("Notifying Chats about restart....")
+    # save queues before leaving, they are resumed on the next boot
+    await queue_store.stop()
+    await db.flush()
     active_chats = await db.get_active_vc()
     count = 0
     for x in active_chats:
-        cid = int(x["chat_id"])
+        cid = int(x.chat_id)
         try:
             await hellbot.app.send_message(
                 cid,
@@ -224,14 +273,13 @@ async def restart_(_, message: Message):
             count += 1
         except Exception:
             pass
-    try:
-        shutil.rmtree("cache")
-        shutil.rmtree("downloads")
-    except:
-        pass
     await hell.edit(
         f"Notified **{count}** chat(s) about the restart.\n\nRestarting now..."
     )
+    if shards.worker:
+        # the front process restarts every worker
+        os.kill(os.getppid(), signal.SIGHUP)
+        return
     os.system(f"kill -9 {os.getpid()} && bash start")
 
 
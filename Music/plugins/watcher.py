@@ -3,7 +3,8 @@ import datetime
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from pyrogram import filters
-from pyrogram.types import Message
+from pyrogram.enums import ChatMemberStatus
+from pyrogram.types import ChatMemberUpdated, Message
 from pytgcalls.types import JoinedGroupCallParticipant, LeftGroupCallParticipant, Update
 from pytgcalls.types.stream import StreamAudioEnded
 
@@ -12,18 +13,20 @@ from Music.core.calls import hellmusic
 from Music.core.clients import hellbot
 from Music.core.database import db
 from Music.core.logger import LOGS
+from Music.core.peers import peers
+from Music.core.shards import shards
 from Music.helpers.buttons import Buttons
+from Music.utils.admins import admin_cache
 from Music.utils.leaderboard import leaders
-from Music.utils.queue import Queue
 
 
 @hellbot.app.on_message(filters.private, group=2)
 async def new_users(_, msg: Message):
     chat_id = msg.from_user.id
     user_name = msg.from_user.first_name
-    if not await db.is_user_exist(chat_id):
+    peers.remember(msg.from_user)
+    if await db.seen_user(chat_id, user_name):
         BOT_USERNAME = hellbot.app.username
-        await db.add_user(chat_id, user_name)
         if Config.LOGGER_ID:
             await hellbot.logit(
                 "newuser",
@@ -31,20 +34,17 @@ async def new_users(_, msg: Message):
             )
         else:
             LOGS.info(f"#NewUser: \n\nName: {user_name} \nID: {chat_id}")
-    else:
-        try:
-            await db.update_user(chat_id, "user_name", user_name)
-        except:
-            pass
     await msg.continue_propagation()
 
 
 @hellbot.app.on_message(filters.group, group=3)
 async def new_users(_, msg: Message):
     chat_id = msg.chat.id
-    if not await db.is_chat_exist(chat_id):
+    peers.remember(msg.chat)
+    if msg.from_user:
+        peers.remember(msg.from_user)
+    if await db.seen_chat(chat_id):
         BOT_USERNAME = hellbot.app.username
-        await db.add_chat(chat_id)
         if Config.LOGGER_ID:
             await hellbot.logit(
                 "newchat",
@@ -68,20 +68,30 @@ async def vc_end(_, msg: Message):
     await msg.continue_propagation()
 
 
-@hellmusic.music.on_kicked()
-@hellmusic.music.on_left()
+@hellbot.app.on_chat_member_updated(filters.group, group=5)
+async def admins_change(_, update: ChatMemberUpdated):
+    # promotions, demotions and changed rights drop the cached admin list
+    statuses = (ChatMemberStatus.ADMINISTRATOR, ChatMemberStatus.OWNER)
+    old = update.old_chat_member
+    new = update.new_chat_member
+    if (old and old.status in statuses) or (new and new.status in statuses):
+        admin_cache.invalidate(update.chat.id)
+
+
+@hellmusic.handler("on_kicked")
+@hellmusic.handler("on_left")
 async def end_streaming(_, chat_id: int):
     await hellmusic.leave_vc(chat_id)
     await db.set_loop(chat_id, 0)
 
 
-@hellmusic.music.on_stream_end()
+@hellmusic.handler("on_stream_end")
 async def changed(_, update: Update):
     if isinstance(update, StreamAudioEnded):
         await hellmusic.change_vc(update.chat_id)
 
 
-@hellmusic.music.on_participants_change()
+@hellmusic.handler("on_participants_change")
 async def members_change(_, update: Update):
     if not isinstance(update, JoinedGroupCallParticipant) and not isinstance(
         update, LeftGroupCallParticipant
@@ -92,6 +102,7 @@ async def members_change(_, update: Update):
         audience = hellmusic.audience.get(chat_id)
         users = await hellmusic.vc_participants(chat_id)
         user_ids = [user.user_id for user in users]
+        await db.update_participants(chat_id, len(user_ids))
         if not audience:
             await hellmusic.autoend(chat_id, user_ids)
         else:
@@ -106,25 +117,6 @@ async def members_change(_, update: Update):
         return
 
 
-async def update_played():
-    while not await asyncio.sleep(1):
-        active_chats = await db.get_active_vc()
-        for x in active_chats:
-            chat_id = int(x["chat_id"])
-            if chat_id == 0:
-                continue
-            is_paused = await db.get_watcher(chat_id, "pause")
-            if is_paused:
-                continue
-            que = Queue.get_queue(chat_id)
-            if que == []:
-                continue
-            Queue.update_duration(chat_id, 1, 1)
-
-
-asyncio.create_task(update_played())
-
-
 async def end_inactive_vc():
     while not await asyncio.sleep(10):
         for chat_id in db.inactive:
@@ -167,6 +159,8 @@ async def leaderboard():
 hrs = leaders.get_hrs()
 min = leaders.get_min()
 
-scheduler = AsyncIOScheduler()
-scheduler.add_job(leaderboard, "cron", hour=hrs, minute=min, timezone=Config.TZ)
-scheduler.start()
+# with shards only the first worker broadcasts
+if shards.main:
+    scheduler = AsyncIOScheduler()
+    scheduler.add_job(leaderboard, "cron", hour=hrs, minute=min, timezone=Config.TZ)
+    scheduler.start()
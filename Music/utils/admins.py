@@ -1,47 +1,91 @@
+import time
+
 from pyrogram.enums import ChatMembersFilter, ChatMemberStatus
 
+from config import Config
 from Music.core.clients import hellbot
 from Music.core.database import db
 
 
+class AdminCache:
+    """
+    Per chat admins (with the manage video chats right) and auth users.
+
+    Filled on first use and dropped by chat member updates, /auth, /unauth
+    and /reload, with `Config.ADMIN_CACHE_TTL` as a fallback for missed
+    updates.
+    """
+
+    def __init__(self):
+        self.admins = {}  # chat_id -> (expires, {user_id: can_manage_video_chats})
+        self.auths = {}  # chat_id -> (expires, set of auth user ids)
+
+    def _fresh(self, cached) -> bool:
+        return cached is not None and cached[0] > time.monotonic()
+
+    async def get_admins(self, chat_id: int) -> dict:
+        cached = self.admins.get(chat_id)
+        if self._fresh(cached):
+            return cached[1]
+        admins = {}
+        async for x in hellbot.app.get_chat_members(
+            chat_id, filter=ChatMembersFilter.ADMINISTRATORS
+        ):
+            admins[x.user.id] = bool(
+                x.status == ChatMemberStatus.ADMINISTRATOR
+                and x.privileges
+                and x.privileges.can_manage_video_chats
+            )
+        self.admins[chat_id] = (time.monotonic() + Config.ADMIN_CACHE_TTL, admins)
+        return admins
+
+    async def get_auths(self, chat_id: int) -> set:
+        cached = self.auths.get(chat_id)
+        if self._fresh(cached):
+            return cached[1]
+        auths = set(await db.get_all_authusers(chat_id))
+        self.auths[chat_id] = (time.monotonic() + Config.ADMIN_CACHE_TTL, auths)
+        return auths
+
+    def add_auth(self, chat_id: int, user_id: int):
+        cached = self.auths.get(chat_id)
+        if cached:
+            cached[1].add(user_id)
+
+    def remove_auth(self, chat_id: int, user_id: int):
+        cached = self.auths.get(chat_id)
+        if cached:
+            cached[1].discard(user_id)
+
+    def invalidate(self, chat_id: int, auths: bool = False):
+        self.admins.pop(chat_id, None)
+        if auths:
+            self.auths.pop(chat_id, None)
+
+
+admin_cache = AdminCache()
+
+
 async def get_admins(chat_id: int):
-    admins = []
-    async for x in hellbot.app.get_chat_members(
-        chat_id, filter=ChatMembersFilter.ADMINISTRATORS
-    ):
-        admins.append(x.user.id)
-    return admins
+    return list(await admin_cache.get_admins(chat_id))
 
 
 async def get_auth_users(chat_id: int):
-    auth_users = []
-    async for x in hellbot.app.get_chat_members(
-        chat_id, filter=ChatMembersFilter.ADMINISTRATORS
-    ):
-        auth_users.append(x.user.id)
-    users = await db.get_all_authusers(chat_id)
-    if users:
-        auth_users.extend(users)
-    return auth_users
+    admins = await admin_cache.get_admins(chat_id)
+    return set(admins) | await admin_cache.get_auths(chat_id)
 
 
 async def get_user_rights(chat_id: int, user_id: int):
     try:
-        user = await hellbot.app.get_chat_member(chat_id, user_id)
+        admins = await admin_cache.get_admins(chat_id)
     except:
         return False
-    if user.status != ChatMemberStatus.ADMINISTRATOR:
-        return False
-    if user.privileges.can_manage_video_chats:
-        return True
-    return False
+    return admins.get(user_id, False)
 
 
 async def get_user_type(chat_id: int, user_id: int):
-    admins = await get_admins(chat_id)
-    auth_users = await get_auth_users(chat_id)
-    if user_id in admins:
+    if user_id in await admin_cache.get_admins(chat_id):
         return "admin"
-    if user_id in auth_users:
+    if user_id in await admin_cache.get_auths(chat_id):
         return "auth"
     return "user"
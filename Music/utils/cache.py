@@ -0,0 +1,189 @@
+import os
+import re
+import time
+from collections import OrderedDict
+
+from config import Config
+from Music.core.logger import LOGS
+
+from .queue import Queue
+
+AUDIO_EXTS = ("mp3", "m4a", "webm")
+VIDEO_EXTS = ("mp4", "webm", "mkv")
+# youtube video ids, telegram downloads in the same folder keep their own names
+VIDEO_ID = re.compile(r"^[A-Za-z0-9_-]{11}$")
+
+
+class MediaCache:
+    """
+    Persistent LRU cache of downloaded tracks in `Config.DWL_DIR`.
+
+    Files are addressed by `<video_id>.<ext>` and survive across tracks and
+    restarts. When the directory grows past `Config.DWL_CACHE_LIMIT` the least
+    recently used files are evicted, except the ones still queued or streaming.
+    """
+
+    def __init__(
+        self, directory: str = None, limit: int = None, name: str = "Media Cache", exts: tuple = None
+    ):
+        self.directory = os.path.normpath(directory or Config.DWL_DIR)
+        self.limit = Config.DWL_CACHE_LIMIT if limit is None else limit
+        self.name = name
+        self.exts = exts  # overrides the audio/video extensions looked up
+        self.files = OrderedDict()
+        self.size = 0
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "evicted": 0,
+            "evicted_bytes": 0,
+        }
+        self.load()
+
+    def _key(self, path: str) -> str:
+        return os.path.normpath(path)
+
+    def _video_id(self, path: str) -> str:
+        return os.path.splitext(os.path.basename(path))[0]
+
+    def load(self):
+        # rebuild the index from disk, oldest first, so the LRU order survives restarts
+        if not os.path.isdir(self.directory):
+            return
+        found = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            video_id, ext = os.path.splitext(name)
+            if not os.path.isfile(path) or not VIDEO_ID.match(video_id):
+                continue
+            if ext[1:] not in (self.exts or AUDIO_EXTS + VIDEO_EXTS):
+                continue
+            stat = os.stat(path)
+            found.append((stat.st_mtime, path, stat.st_size))
+        for last_used, path, size in sorted(found):
+            self.files[self._key(path)] = {
+                "size": size,
+                "hits": 0,
+                "last_used": last_used,
+            }
+            self.size += size
+        if found:
+            LOGS.info(
+                f"[MediaCache] Loaded {len(found)} files ({round(self.size / 1024 / 1024, 2)} MB)."
+            )
+
+    def is_cached(self, path: str) -> bool:
+        if not path:
+            return False
+        return self._key(path) in self.files
+
+    def find(self, video_id: str, video: bool = False):
+        """Like `lookup` but without touching the file or counting stats."""
+        for ext in self.exts or (VIDEO_EXTS if video else AUDIO_EXTS):
+            path = self._key(os.path.join(self.directory, f"{video_id}.{ext}"))
+            if not os.path.exists(path):
+                self.files.pop(path, None)
+                continue
+            if path not in self.files:
+                self.add(path, trim=False)
+            return path
+        return None
+
+    def lookup(self, video_id: str, video: bool = False):
+        """Return the cached file for this video id or None on a miss."""
+        path = self.find(video_id, video)
+        if path:
+            self.touch(path)
+            self.stats["hits"] += 1
+            return path
+        self.stats["misses"] += 1
+        return None
+
+    def touch(self, path: str):
+        key = self._key(path)
+        entry = self.files.get(key)
+        if not entry:
+            return
+        entry["hits"] += 1
+        entry["last_used"] = time.time()
+        self.files.move_to_end(key)
+        try:
+            os.utime(key)
+        except OSError:
+            pass
+
+    def add(self, path: str, trim: bool = True):
+        key = self._key(path)
+        if not os.path.exists(key):
+            return
+        size = os.path.getsize(key)
+        previous = self.files.pop(key, None)
+        if previous:
+            self.size -= previous["size"]
+        self.files[key] = {
+            "size": size,
+            "hits": previous["hits"] if previous else 0,
+            "last_used": time.time(),
+        }
+        self.size += size
+        if trim:
+            self.trim()
+
+    def remove(self, path: str):
+        key = self._key(path)
+        entry = self.files.pop(key, None)
+        if entry:
+            self.size -= entry["size"]
+        try:
+            os.remove(key)
+        except OSError:
+            pass
+
+    def pinned(self) -> set:
+        # video ids that are queued or streaming right now, in any chat
+        pins = set()
+        for que in Queue.queue.values():
+            for item in que:
+                pins.add(self._video_id(str(item.file)))
+                pins.add(str(item.video_id))
+        for files in Config.CACHE.values():
+            if not isinstance(files, list):
+                continue
+            for file in files:
+                if isinstance(file, str):
+                    pins.add(self._video_id(file))
+        return pins
+
+    def trim(self):
+        if self.limit == 0 or self.size <= self.limit:
+            return
+        pins = self.pinned()
+        for key in list(self.files.keys()):
+            if self.size <= self.limit:
+                break
+            if self._video_id(key) in pins:
+                continue
+            size = self.files[key]["size"]
+            self.remove(key)
+            self.stats["evicted"] += 1
+            self.stats["evicted_bytes"] += size
+
+    def format_stats(self) -> str:
+        hits = self.stats["hits"]
+        misses = self.stats["misses"]
+        lookups = hits + misses
+        ratio = round(hits / lookups * 100, 2) if lookups else 0
+        limit = (
+            f"{round(self.limit / 1024 / 1024, 2)} MB" if self.limit else "No Limit"
+        )
+        return (
+            f"**🗂 {self.name}**\n\n"
+            f"**Files:** `{len(self.files)}`\n"
+            f"**Size:** `{round(self.size / 1024 / 1024, 2)} MB / {limit}`\n"
+            f"**Hits:** `{hits}` | **Misses:** `{misses}` | **Ratio:** `{ratio}%`\n"
+            f"**Evicted:** `{self.stats['evicted']}` "
+            f"(`{round(self.stats['evicted_bytes'] / 1024 / 1024, 2)} MB`)"
+        )
+
+
+media_cache = MediaCache()
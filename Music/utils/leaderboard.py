@@ -10,6 +10,7 @@ from pyrogram.types import InlineKeyboardMarkup
 
 from config import Config
 from Music.core.database import db
+from Music.core.shards import shards
 
 
 class Leaderboard:
@@ -17,6 +18,64 @@ class Leaderboard:
         # file used to log failed chats during broadcast
         self.file_name = "leaderboard.txt"
 
+        # top users snapshot, best first, kept current as plays are counted
+        self.size = 10
+        self.top = None
+        self.floor = 0  # most songs any user outside the snapshot had when it was taken
+        self.gains = {}  # plays of users outside the snapshot since then
+        db.watch_plays(self.count)
+
+    def count(self, user_id: int, plays: int):
+        if self.top is None:
+            return
+        for user in self.top:
+            if user["id"] == user_id:
+                user["songs"] += plays
+                self.top.sort(key=lambda x: x["songs"], reverse=True)
+                return
+        gain = self.gains.get(user_id, 0) + plays
+        self.gains[user_id] = gain
+        if len(self.top) < self.size or self.floor + gain > self.top[-1]["songs"]:
+            # this user might have climbed into the top, rebuild on the next read
+            self.top = None
+
+    def _parse(self, user: dict):
+        # user_id
+        try:
+            uid = int(user.get("user_id"))
+        except (TypeError, ValueError):
+            # skip malformed records
+            return None
+
+        # songs_played may be missing -> default 0
+        songs = int(user.get("songs_played", 0) or 0)
+
+        # username / display name fallback chain
+        user_name = (
+            user.get("user_name")
+            or user.get("first_name")
+            or user.get("name")
+            or "Unknown User"
+        )
+        return {"id": uid, "songs": songs, "user": user_name}
+
+    async def load(self):
+        # write pending plays first so the indexed query sees them
+        await db.flush()
+        users = await db.get_top_users(self.size + 1)
+        users = [x for x in map(self._parse, users) if x]
+        # plays counted while the query ran
+        for user in users:
+            user["songs"] += db.played.get(user["id"], 0)
+        users.sort(key=lambda x: x["songs"], reverse=True)
+        self.floor = users[self.size]["songs"] if len(users) > self.size else 0
+        self.gains = {
+            uid: plays
+            for uid, plays in db.played.items()
+            if uid not in [x["id"] for x in users[: self.size]]
+        }
+        self.top = users[: self.size]
+
     def get_hrs(self) -> int:
         try:
             hrs = int(Config.LEADERBOARD_TIME.split(":")[0])
@@ -35,38 +94,13 @@ class Leaderboard:
         """Return a list of at most 10 users sorted by songs_played desc.
 
         Each item is a dict: {"id": int, "songs": int, "user": str}
-        This function is tolerant to older user docs that may be missing
-        songs_played or user_name.
+        Served from the snapshot, which is rebuilt from the songs_played
+        index only when it may be out of date. Shard workers only see their
+        own plays, so they always rebuild it.
         """
-        users_cursor = await db.get_all_users()
-        all_guys = []
-
-        async for user in users_cursor:
-            # user_id
-            try:
-                uid = int(user.get("user_id"))
-            except (TypeError, ValueError):
-                # skip malformed records
-                continue
-
-            # songs_played may be missing -> default 0
-            songs = int(user.get("songs_played", 0) or 0)
-
-            # username / display name fallback chain
-            user_name = (
-                user.get("user_name")
-                or user.get("first_name")
-                or user.get("name")
-                or "Unknown User"
-            )
-
-            all_guys.append({"id": uid, "songs": songs, "user": user_name})
-
-        if not all_guys:
-            return []
-
-        all_guys = sorted(all_guys, key=lambda x: x["songs"], reverse=True)
-        return all_guys[:10]
+        if self.top is None or shards.worker:
+            await self.load()
+        return [dict(x) for x in self.top]
 
     async def generate(self, bot_details: dict) -> str:
         """Generate the leaderboard text for /topusers or similar commands.
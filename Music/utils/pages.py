@@ -48,6 +48,7 @@ class Pages:
                 text += f"**{'0' if index < 10 else ''}{index}:** {active['title']} [`{active['chat_id']}`]\n"
                 text += f"    **Listeners:** __{active['participants']}__\n"
                 text += f"    **Playing:** __{active['playing']}__\n"
+                text += f"    **Assistant:** __{active['assistant']}__\n"
                 text += f"    **VC Type:** __{active['vc_type']}__\n"
                 text += f"    **Since:** __{active['active_since']}__\n\n"
         except IndexError:
@@ -57,6 +58,7 @@ class Pages:
                 text += f"**{'0' if index < 10 else ''}{index}:** {active['title']} [`{active['chat_id']}`]\n"
                 text += f"    **Listeners:** __{active['participants']}__\n"
                 text += f"    **Playing:** __{active['playing']}__\n"
+                text += f"    **Assistant:** __{active['assistant']}__\n"
                 text += f"    **Since:** __{active['active_since']}__\n\n"
         if edit:
             await m.edit_text(text, reply_markup=InlineKeyboardMarkup(btns))
@@ -138,10 +140,10 @@ class Pages:
         try:
             for que in grouped[page]:
                 index += 1
-                text += f"**{'0' if index < 10 else ''}{index}:** {que['title']}\n"
-                text += f"    **VC Type:** {que['vc_type']}\n"
-                text += f"    **Requested By:** {que['user']}\n"
-                text += f"    **Duration:** __{que['duration']}__\n\n"
+                text += f"**{'0' if index < 10 else ''}{index}:** {que.title}\n"
+                text += f"    **VC Type:** {que.vc_type}\n"
+                text += f"    **Requested By:** {que.user}\n"
+                text += f"    **Duration:** __{que.duration}__\n\n"
         except IndexError:
             return await m.edit_text("**No more tracks in queue!**")
         if edit:
@@ -0,0 +1,168 @@
+import asyncio
+import datetime
+import os
+
+from pymongo import DeleteOne, ReplaceOne, UpdateOne
+from pyrogram.types import InlineKeyboardMarkup
+
+from config import Config
+from Music.core.calls import hellmusic
+from Music.core.clients import hellbot
+from Music.core.database import db
+from Music.core.logger import LOGS
+from Music.core.shards import shards
+from Music.helpers.buttons import Buttons
+from Music.helpers.formatters import formatter
+
+from .queue import Queue
+from .youtube import ytube
+
+FIELDS = ("chat_id", "user_id", "duration", "file", "title", "user", "video_id", "vc_type")
+
+
+class QueueStore:
+    """
+    Write-behind persistence of chat queues and playback state in `db.queues`.
+
+    Queue changes only mark the chat dirty. Every `Config.STATE_FLUSH` seconds
+    the changes are sent in one bulk write: dirty chats get their whole
+    document replaced, playing chats only get the position, pause and loop
+    fields updated when they moved. On boot the saved queues are restored and
+    their voice chats joined again.
+    """
+
+    def __init__(self):
+        self.interval = max(1, Config.STATE_FLUSH)
+        self.enabled = Config.PERSIST_QUEUES.lower() == "on"
+        self.dirty = set()
+        self.saved = {}  # chat_id -> playback fields last written
+        self.task = None
+        self.frozen = False
+        if self.enabled:
+            Queue.watch(self.dirty.add)
+
+    def _playback(self, chat_id: int) -> dict:
+        current = Queue.get_current(chat_id)
+        return {
+            "position": Queue.get_played(chat_id),
+            "paused": bool(current and current.paused_at),
+            "loop": db.loop.get(chat_id, 0),
+            "watcher": dict(db.watcher.get(chat_id, {})),
+        }
+
+    def _document(self, chat_id: int) -> dict:
+        tracks = [{key: getattr(x, key) for key in FIELDS} for x in Queue.get_queue(chat_id)]
+        return {"_id": chat_id, "tracks": tracks, **self._playback(chat_id)}
+
+    def _operations(self) -> list:
+        ops = []
+        dirty, self.dirty = self.dirty, set()
+        for chat_id in dirty:
+            if Queue.length(chat_id):
+                doc = self._document(chat_id)
+                doc["saved_at"] = datetime.datetime.now()
+                ops.append(ReplaceOne({"_id": chat_id}, doc, upsert=True))
+                self.saved[chat_id] = {k: doc[k] for k in ("position", "paused", "loop", "watcher")}
+            else:
+                ops.append(DeleteOne({"_id": chat_id}))
+                self.saved.pop(chat_id, None)
+        for chat_id, last in self.saved.items():
+            if chat_id in dirty:
+                continue
+            state = self._playback(chat_id)
+            if state != last:
+                update = {**state, "saved_at": datetime.datetime.now()}
+                ops.append(UpdateOne({"_id": chat_id}, {"$set": update}))
+                self.saved[chat_id] = state
+        return ops
+
+    async def flush(self):
+        if not self.enabled or self.frozen:
+            return
+        ops = self._operations()
+        if not ops:
+            return
+        try:
+            await db.queues.bulk_write(ops, ordered=False)
+        except Exception as e:
+            LOGS.error(f"[QueueStore] Flush failed: {e}")
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    async def start(self):
+        if not self.enabled:
+            return
+        docs = [doc async for doc in db.queues.find({}) if shards.owns(doc["_id"])]
+        self.task = asyncio.ensure_future(self._loop())
+        if docs:
+            LOGS.info(f"[QueueStore] Restoring {len(docs)} queue(s).")
+            asyncio.ensure_future(self.restore(docs))
+
+    async def stop(self):
+        """Write everything out once more and stop persisting (shutdown and /restart)."""
+        if self.task:
+            self.task.cancel()
+            self.task = None
+        self.dirty.update(Queue.queue.keys())
+        await self.flush()
+        self.frozen = True
+
+    async def restore(self, docs: list):
+        for doc in docs:
+            chat_id = doc["_id"]
+            try:
+                async with Queue.lock(chat_id):
+                    await self._restore(chat_id, doc)
+            except Exception as e:
+                LOGS.error(f"[QueueStore] Could not resume {chat_id}: {e}")
+                Queue.clear_queue(chat_id)
+
+    async def _restore(self, chat_id: int, doc: dict):
+        tracks = [
+            x for x in doc.get("tracks", [])
+            if x["video_id"] != "telegram" or os.path.exists(x["file"])
+        ]
+        if not tracks:
+            return await db.queues.delete_one({"_id": chat_id})
+        for track in tracks:
+            Queue.put_queue(*[track[key] for key in FIELDS])
+        db.loop[chat_id] = doc.get("loop", 0)
+        db.watcher[chat_id] = doc.get("watcher", {})
+
+        head = Queue.get_current(chat_id)
+        video = head.vc_type == "video"
+        if head.video_id == "telegram":
+            file_path = head.file
+        else:
+            file_path = await ytube.download(head.video_id, True, video)
+        position = doc.get("position", 0) if Config.RESUME_POSITION.lower() == "on" else 0
+        try:
+            if position >= formatter.mins_to_secs(head.duration):
+                position = 0
+        except ValueError:
+            position = 0
+        await hellmusic.join_vc(chat_id, file_path, video, position)
+        if doc.get("paused"):
+            await hellmusic.pause_vc(chat_id)
+        if db.watcher[chat_id].get("mute"):
+            await hellmusic.mute_vc(chat_id)
+        try:
+            Config.PLAYER_CACHE[chat_id] = await hellbot.app.send_message(
+                chat_id,
+                f"**Resumed after restart:** `{head.title}` from `{formatter.secs_to_mins(position)}`",
+                reply_markup=InlineKeyboardMarkup(
+                    Buttons.player_markup(
+                        chat_id,
+                        "None" if head.video_id == "telegram" else head.video_id,
+                        hellbot.app.username,
+                    )
+                ),
+            )
+        except:
+            pass
+
+
+queue_store = QueueStore()
@@ -1,4 +1,5 @@
 import os
+import time
 
 from pyrogram.enums import MessageEntityType
 from pyrogram.types import InlineKeyboardMarkup, Message
@@ -8,10 +9,13 @@ from Music.core.calls import hellmusic
 from Music.core.clients import hellbot
 from Music.core.database import db
 from Music.core.logger import LOGS
+from Music.core.peers import peers
 from Music.helpers.buttons import Buttons
 from Music.helpers.strings import TEXTS
 
+from .cache import media_cache
 from .queue import Queue
+from .streams import streamer
 from .thumbnail import thumb
 from .youtube import ytube
 
@@ -61,8 +65,10 @@ class Player:
             vc_type,
             force,
         ) = context.values()
+        started = time.monotonic()
         if force:
             await hellmusic.leave_vc(chat_id, True)
+        mode = None
         if video_id == "telegram":
             file_path = file
         else:
@@ -71,12 +77,17 @@ class Player:
                     await message.edit_text("Downloading ...")
                 else:
                     await message.reply_text("Downloading ...")
-                file_path = await ytube.download(
-                    video_id, True, True if vc_type == "video" else False
-                )
+                video = True if vc_type == "video" else False
+                if Queue.length(chat_id) and not force:
+                    # queued behind other tracks, only the file is useful
+                    file_path = await ytube.download(video_id, True, video)
+                else:
+                    file_path, mode = await streamer.source(video_id, video)
 
                 # EXTRA SAFETY: if download somehow fails silently
-                if not file_path or not os.path.exists(file_path):
+                if not file_path or (
+                    mode != "stream" and not os.path.exists(file_path)
+                ):
                     text = "Failed to download the requested media. Please try again."
                     if edit:
                         await message.edit_text(text)
@@ -90,32 +101,40 @@ class Player:
                 else:
                     await message.reply_text(str(e))
                 return
-        position = Queue.put_queue(
-            chat_id,
-            user_id,
-            duration,
-            file_path,
-            title,
-            user,
-            video_id,
-            vc_type,
-            force,
-        )
+        error = None
+        async with Queue.lock(chat_id):
+            position = Queue.put_queue(
+                chat_id,
+                user_id,
+                duration,
+                # a streamed track is queued like a pending download, seeks wait for the file
+                video_id if mode == "stream" else file_path,
+                title,
+                user,
+                video_id,
+                vc_type,
+                force,
+            )
+            if position == 0:
+                photo = await thumb.generate(video_id)
+                try:
+                    await hellmusic.join_vc(
+                        chat_id, file_path, True if vc_type == "video" else False
+                    )
+                    if mode:
+                        streamer.record(video_id, mode, started)
+                except Exception as e:
+                    Queue.clear_queue(chat_id)
+                    error = e
         if position == 0:
-            photo = thumb.generate(video_id)
-            try:
-                await hellmusic.join_vc(
-                    chat_id, file_path, True if vc_type == "video" else False
-                )
-            except Exception as e:
+            if error:
                 await message.delete()
-                await message.reply_text(str(e))
-                Queue.clear_queue(chat_id)
+                await message.reply_text(str(error))
                 try:
-                    if os.path.exists(file_path):
+                    if os.path.exists(file_path) and not media_cache.is_cached(
+                        file_path
+                    ):
                         os.remove(file_path)
-                    if photo and os.path.exists(photo):
-                        os.remove(photo)
                 except Exception:
                     pass
                 return
@@ -132,10 +151,6 @@ class Player:
                     ),
                     reply_markup=InlineKeyboardMarkup(btns),
                 )
-                try:
-                    os.remove(photo)
-                except Exception:
-                    pass
             else:
                 sent = await hellbot.app.send_message(
                     chat_id,
@@ -174,9 +189,8 @@ class Player:
             Config.QUEUE_CACHE[chat_id] = sent
             return await message.delete()
         await message.delete()
-        await db.update_songs_count(1)
-        await db.update_user(user_id, "songs_played", 1)
-        chat_name = (await hellbot.app.get_chat(chat_id)).title
+        db.count_play(user_id)
+        chat_name = await peers.chat_title(chat_id)
         await hellbot.logit(
             f"play {vc_type}",
             f"**⤷ Song:** `{title}` \n**⤷ Chat:** {chat_name} [`{chat_id}`] \n**⤷ User:** {user}",
@@ -188,24 +202,23 @@ class Player:
         await message.delete()
 
     async def replay(self, chat_id: int, message: Message):
+        async with Queue.lock(chat_id):
+            await self._replay(chat_id, message)
+
+    async def _replay(self, chat_id: int, message: Message):
         que = Queue.get_current(chat_id)
         if not que:
             return await message.edit_text("Nothing is playing to replay")
-        video = True if que["vc_type"] == "video" else False
-        photo = thumb.generate(que["video_id"])
-        if que["file"] == que["video_id"]:
-            file_path = await ytube.download(que["video_id"], True, video)
+        video = True if que.vc_type == "video" else False
+        photo = await thumb.generate(que.video_id)
+        if que.file == que.video_id:
+            file_path = await ytube.download(que.video_id, True, video)
         else:
-            file_path = que["file"]
+            file_path = que.file
 
         # EXTRA SAFETY: if download somehow fails
-        if not file_path or (que["file"] == que["video_id"] and not os.path.exists(file_path)):
+        if not file_path or (que.file == que.video_id and not os.path.exists(file_path)):
             await message.edit_text("Failed to download media again. Try another song.")
-            try:
-                if photo and os.path.exists(photo):
-                    os.remove(photo)
-            except Exception:
-                pass
             return
 
         try:
@@ -215,38 +228,36 @@ class Player:
             await message.reply_text(str(e))
             Queue.clear_queue(chat_id)
             try:
-                if que["file"] and os.path.exists(que["file"]):
-                    os.remove(que["file"])
-                if photo and os.path.exists(photo):
-                    os.remove(photo)
+                if (
+                    que.file
+                    and os.path.exists(que.file)
+                    and not media_cache.is_cached(que.file)
+                ):
+                    os.remove(que.file)
             except Exception:
                 pass
             return
-        btns = Buttons.player_markup(chat_id, que["video_id"], hellbot.app.username)
+        btns = Buttons.player_markup(chat_id, que.video_id, hellbot.app.username)
         if photo:
             sent = await hellbot.app.send_photo(
                 chat_id,
                 photo,
                 TEXTS.PLAYING.format(
                     hellbot.app.mention,
-                    que["title"],
-                    que["duration"],
-                    que["user"],
+                    que.title,
+                    que.duration,
+                    que.user,
                 ),
                 reply_markup=InlineKeyboardMarkup(btns),
             )
-            try:
-                os.remove(photo)
-            except Exception:
-                pass
         else:
             sent = await hellbot.app.send_message(
                 chat_id,
                 TEXTS.PLAYING.format(
                     hellbot.app.mention,
-                    que["title"],
-                    que["duration"],
-                    que["user"],
+                    que.title,
+                    que.duration,
+                    que.user,
                 ),
                 reply_markup=InlineKeyboardMarkup(btns),
             )
@@ -269,37 +280,48 @@ class Player:
             await message.edit_text(
                 "This chat have an active vc. Adding songs from playlist in the queue... \n\n__This might take some time!__"
             )
-        previously = len(Queue.get_queue(message.chat.id))
-        for i in collection:
+        previously = Queue.length(message.chat.id)
+        # tracks are queued as their details arrive, the first one starts playing right away
+        async for data in ytube.resolve_many(collection):
+            if data is None:
+                failed += 1
+                continue
             try:
-                data = (await ytube.get_data(i, True, 1))[0]
                 if count == 0 and previously == 0:
-                    file_path = await ytube.download(data["id"], True, video)
-                    if not file_path or not os.path.exists(file_path):
+                    started = time.monotonic()
+                    file_path, mode = await streamer.source(data["id"], video)
+                    if not file_path or (
+                        mode != "stream" and not os.path.exists(file_path)
+                    ):
                         failed += 1
                         continue
-                    _queue = Queue.put_queue(
-                        message.chat.id,
-                        user_id,
-                        data["duration"],
-                        file_path,
-                        data["title"],
-                        user_mention,
-                        data["id"],
-                        vc_type,
-                        False,
-                    )
-                    try:
-                        photo = thumb.generate(data["id"])
-                        await hellmusic.join_vc(message.chat.id, file_path, video)
-                    except Exception as e:
-                        await message.edit_text(str(e))
-                        Queue.clear_queue(message.chat.id)
+                    error = None
+                    async with Queue.lock(message.chat.id):
+                        _queue = Queue.put_queue(
+                            message.chat.id,
+                            user_id,
+                            data["duration"],
+                            data["id"] if mode == "stream" else file_path,
+                            data["title"],
+                            user_mention,
+                            data["id"],
+                            vc_type,
+                            False,
+                        )
+                        try:
+                            photo = await thumb.generate(data["id"])
+                            await hellmusic.join_vc(message.chat.id, file_path, video)
+                            streamer.record(data["id"], mode, started)
+                        except Exception as e:
+                            Queue.clear_queue(message.chat.id)
+                            error = e
+                    if error:
+                        await message.edit_text(str(error))
                         try:
-                            if os.path.exists(file_path):
+                            if os.path.exists(
+                                file_path
+                            ) and not media_cache.is_cached(file_path):
                                 os.remove(file_path)
-                            if photo and os.path.exists(photo):
-                                os.remove(photo)
                         except Exception:
                             pass
                         return
@@ -318,10 +340,6 @@ class Player:
                             ),
                             reply_markup=InlineKeyboardMarkup(btns),
                         )
-                        try:
-                            os.remove(photo)
-                        except Exception:
-                            pass
                     else:
                         sent = await hellbot.app.send_message(
                             message.chat.id,
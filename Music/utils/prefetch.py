@@ -0,0 +1,111 @@
+import asyncio
+
+from config import Config
+from Music.core.logger import LOGS
+
+from .cache import media_cache
+from .queue import Queue
+from .transcode import transcoder
+from .youtube import ytube
+
+
+class Prefetcher:
+    """
+    Downloads the next `Config.PREFETCH_COUNT` tracks of every queue in the
+    background, so `HellMusic.change_vc` finds them in the media cache and the
+    switch to the next track is gapless.
+
+    It follows the queue through `Queue.watch`: entries that leave the window
+    (removed, skipped past or cleared) get their prefetch cancelled.
+    """
+
+    def __init__(self, count: int):
+        self.count = max(0, count)
+        self.tasks = {}  # chat_id -> {(video_id, video): task}
+        self.stats = {
+            "started": 0,
+            "done": 0,
+            "failed": 0,
+            "cancelled": 0,
+        }
+        Queue.watch(self.sync)
+
+    def _wanted(self, chat_id: int) -> set:
+        # the playing track is kept too, change_vc may still be waiting on it
+        wanted = set()
+        for entry in Queue.peek(chat_id, self.count + 1):
+            if entry.video_id == "telegram" or entry.file != entry.video_id:
+                continue
+            wanted.add((entry.video_id, entry.vc_type == "video"))
+        return wanted
+
+    def sync(self, chat_id: int):
+        if not self.count:
+            return
+        tasks = self.tasks.setdefault(chat_id, {})
+        wanted = self._wanted(chat_id)
+        for key in list(tasks.keys()):
+            if key not in wanted:
+                self._drop(tasks, key)
+        for key in wanted:
+            if key in tasks or media_cache.find(*key):
+                continue
+            task = asyncio.ensure_future(self._fetch(*key))
+            tasks[key] = task
+            task.add_done_callback(
+                lambda done, key=key: self._done(chat_id, key, done)
+            )
+            self.stats["started"] += 1
+        if not tasks:
+            self.tasks.pop(chat_id, None)
+
+    def clear(self, chat_id: int):
+        tasks = self.tasks.pop(chat_id, {})
+        for key in list(tasks.keys()):
+            self._drop(tasks, key)
+
+    def _drop(self, tasks: dict, key: tuple):
+        task = tasks.pop(key, None)
+        if task is None or task.done():
+            return
+        # the shared download only stops when this prefetch is its sole waiter,
+        # checked before cancelling so the waiter set still holds the task
+        ytube.cancel(*key, owner=task)
+        task.cancel()
+        self.stats["cancelled"] += 1
+
+    async def _fetch(self, video_id: str, video: bool):
+        try:
+            path = await ytube.download(video_id, True, video)
+            if not video:
+                transcoder.schedule(path)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            LOGS.warning(f"[Prefetch] {video_id}: {e}")
+            raise
+
+    def _done(self, chat_id: int, key: tuple, task: asyncio.Task):
+        tasks = self.tasks.get(chat_id)
+        if tasks and tasks.get(key) is task:
+            del tasks[key]
+            if not tasks:
+                self.tasks.pop(chat_id, None)
+        if task.cancelled():
+            return
+        if task.exception():
+            self.stats["failed"] += 1
+        else:
+            self.stats["done"] += 1
+
+    def format_stats(self) -> str:
+        running = sum(len(tasks) for tasks in self.tasks.values())
+        return (
+            "**⏩ Prefetch**\n\n"
+            f"**Window:** `{self.count}` | **Running:** `{running}`\n"
+            f"**Started:** `{self.stats['started']}` | **Done:** `{self.stats['done']}`\n"
+            f"**Failed:** `{self.stats['failed']}` | **Cancelled:** `{self.stats['cancelled']}`"
+        )
+
+
+prefetcher = Prefetcher(Config.PREFETCH_COUNT)
@@ -1,9 +1,96 @@
+import asyncio
+import time
+from collections import deque
+from itertools import islice
+
 from config import Config
 
 
+class QueueEntry(object):
+    __slots__ = (
+        "chat_id",
+        "user_id",
+        "duration",
+        "file",
+        "title",
+        "user",
+        "video_id",
+        "vc_type",
+        "started",
+        "paused_at",
+        "paused",
+        "offset",
+    )
+
+    def __init__(
+        self,
+        chat_id: int,
+        user_id: int,
+        duration: str,
+        file: str,
+        title: str,
+        user: str,
+        video_id: str,
+        vc_type: str = "voice",
+    ):
+        self.chat_id = chat_id
+        self.user_id = user_id
+        self.duration = duration
+        self.file = file
+        self.title = title
+        self.user = user
+        self.video_id = video_id
+        self.vc_type = vc_type
+        # playback clock, see QueueDB.start_clock
+        self.started = 0
+        self.paused_at = 0
+        self.paused = 0
+        self.offset = 0
+
+
 class QueueDB:
+    """
+    Per chat queues of `QueueEntry`, head first.
+
+    Every method here is synchronous, so a single call is atomic on the event
+    loop. Transitions that await between steps hold `lock(chat_id)` so they
+    can't interleave: stream end and skip (`HellMusic.change_vc`), leaving,
+    clean, starting a track or playlist, replay and seeks.
+    """
+
     def __init__(self):
         self.queue = {}
+        self.locks = {}
+        self.watchers = []
+
+    def watch(self, callback):
+        """Call `callback(chat_id)` after every change to a chat queue."""
+        self.watchers.append(callback)
+
+    def _changed(self, chat_id: int):
+        for callback in self.watchers:
+            try:
+                callback(chat_id)
+            except:
+                pass
+
+    def lock(self, chat_id: int) -> asyncio.Lock:
+        lock = self.locks.get(chat_id)
+        if lock is None:
+            lock = self.locks[chat_id] = asyncio.Lock()
+        return lock
+
+    def _pin(self, chat_id: int, file: str):
+        try:
+            Config.CACHE[chat_id].append(file)
+        except KeyError:
+            Config.CACHE[chat_id] = [file]
+
+    def _unpin(self, chat_id: int, file: str):
+        try:
+            Config.CACHE[chat_id].remove(file)
+        except (KeyError, ValueError):
+            pass
 
     def put_queue(
         self,
@@ -17,75 +104,118 @@ class QueueDB:
         vc_type: str = "voice",
         forceplay: bool = False,
     ) -> int:
-        context = {
-            "chat_id": chat_id,
-            "user_id": user_id,
-            "duration": duration,
-            "file": file,
-            "title": title,
-            "user": user,
-            "video_id": video_id,
-            "vc_type": vc_type,
-            "played": 0,
-        }
+        entry = QueueEntry(
+            chat_id, user_id, duration, file, title, user, video_id, vc_type
+        )
+        que = self.queue.get(chat_id)
+        if que is None:
+            que = self.queue[chat_id] = deque()
         if forceplay:
-            que = self.queue.get(chat_id)
-            if que:
-                que.insert(0, context)
-            else:
-                self.queue[chat_id] = []
-                self.queue[chat_id].append(context)
+            que.appendleft(entry)
         else:
-            try:
-                self.queue[chat_id].append(context)
-            except KeyError:
-                self.queue[chat_id] = []
-                self.queue[chat_id].append(context)
-        try:
-            Config.CACHE[chat_id].append(file)
-        except KeyError:
-            Config.CACHE[chat_id] = []
-            Config.CACHE[chat_id].append(file)
+            que.append(entry)
+        self._pin(chat_id, file)
+        self._changed(chat_id)
 
-        position = len(self.queue.get(chat_id)) - 1
+        position = 0 if forceplay else len(que) - 1
 
         return position
 
     def get_queue(self, chat_id: int) -> list:
-        que = self.queue.get(chat_id) or []
-        return que
+        que = self.queue.get(chat_id)
+        return list(que) if que else []
+
+    def peek(self, chat_id: int, count: int) -> list:
+        que = self.queue.get(chat_id)
+        return list(islice(que, count)) if que else []
+
+    def length(self, chat_id: int) -> int:
+        que = self.queue.get(chat_id)
+        return len(que) if que else 0
+
+    def advance(self, chat_id: int):
+        """Drop the playing track and return its file."""
+        return self.rm_queue(chat_id, 0)
 
     def rm_queue(self, chat_id: int, index: int):
+        que = self.queue.get(chat_id)
+        if not que:
+            return None
         try:
-            db = self.queue.get(chat_id)
-            file = db[index]["file"]
-            db.pop(index)
-            return file
+            if index == 0:
+                entry = que.popleft()
+            else:
+                entry = que[index]
+                del que[index]
         except IndexError:
             return None
+        self._unpin(chat_id, entry.file)
+        self._changed(chat_id)
+        return entry.file
 
-    def clear_queue(self, chat_id: int):
+    def move(self, chat_id: int, src: int, dst: int) -> bool:
+        que = self.queue.get(chat_id)
+        if not que:
+            return False
         try:
-            self.queue[chat_id] = []
-        except KeyError:
-            pass
+            entry = que[src]
+            del que[src]
+        except IndexError:
+            return False
+        que.insert(min(dst, len(que)), entry)
+        self._changed(chat_id)
+        return True
+
+    def clear_queue(self, chat_id: int):
+        que = self.queue.get(chat_id)
+        if que is not None:
+            que.clear()
+        Config.CACHE.pop(chat_id, None)
+        self._changed(chat_id)
 
     def get_current(self, chat_id: int):
-        try:
-            return self.queue[chat_id][0]
-        except KeyError:
-            return None
-        except IndexError:
-            return None
+        que = self.queue.get(chat_id)
+        return que[0] if que else None
 
-    def update_duration(self, chat_id: int, seek_type: int, time: int):
-        try:
-            if seek_type == 0:
-                self.queue[chat_id][0]["played"] -= time
-            else:
-                self.queue[chat_id][0]["played"] += time
-        except IndexError:
-            pass
+    def playing(self, video_id: str) -> list:
+        """Chats whose current track is this video id."""
+        return [
+            chat_id for chat_id, que in self.queue.items()
+            if que and que[0].video_id == video_id
+        ]
+
+    # playback clock #
+    # position = offset + (now - started - paused), all on the monotonic clock
+    def start_clock(self, chat_id: int, offset: int = 0):
+        que = self.get_current(chat_id)
+        if not que:
+            return
+        now = time.monotonic()
+        que.started = now
+        que.paused = 0
+        que.paused_at = now if que.paused_at else 0
+        que.offset = offset
+
+    def pause_clock(self, chat_id: int):
+        que = self.get_current(chat_id)
+        if que and not que.paused_at:
+            que.paused_at = time.monotonic()
+
+    def resume_clock(self, chat_id: int):
+        que = self.get_current(chat_id)
+        if que and que.paused_at:
+            que.paused += time.monotonic() - que.paused_at
+            que.paused_at = 0
+
+    def get_played(self, chat_id: int) -> int:
+        que = self.get_current(chat_id)
+        if not que or not que.started:
+            return 0
+        now = que.paused_at or time.monotonic()
+        return max(0, int(que.offset + now - que.started - que.paused))
+
+    def set_position(self, chat_id: int, seconds: int):
+        self.start_clock(chat_id, seconds)
 
 
 Queue = QueueDB()
@@ -0,0 +1,82 @@
+import time
+from collections import OrderedDict
+
+from config import Config
+
+
+class SearchCache:
+    """
+    Results of `YouTube.get_data`, so repeated searches resolve locally.
+
+    Searches are keyed by the normalized query, links by their case sensitive
+    video id, and every result is also kept by its video id. Entries live for `Config.SEARCH_CACHE_TTL` seconds, at
+    most `Config.SEARCH_CACHE_SIZE` of each kind, least recently used dropped
+    first.
+    """
+
+    def __init__(self):
+        self.queries = OrderedDict()  # query -> (expires, limit, results)
+        self.videos = OrderedDict()  # video_id -> (expires, context)
+        self.stats = {
+            "query_hits": 0,
+            "video_hits": 0,
+            "misses": 0,
+        }
+
+    def normalize(self, query: str, video_id: str = None) -> str:
+        # video ids are case sensitive, only free text is folded
+        if video_id:
+            return f"id:{video_id}"
+        return " ".join(query.lower().split())
+
+    def _get(self, entries: OrderedDict, key: str):
+        cached = entries.get(key)
+        if cached is None:
+            return None
+        if cached[0] < time.monotonic():
+            del entries[key]
+            return None
+        entries.move_to_end(key)
+        return cached
+
+    def _set(self, entries: OrderedDict, key: str, value: tuple):
+        entries[key] = (time.monotonic() + Config.SEARCH_CACHE_TTL, *value)
+        entries.move_to_end(key)
+        while len(entries) > Config.SEARCH_CACHE_SIZE:
+            entries.popitem(last=False)
+
+    def lookup(self, query: str, limit: int, video_id: str = None):
+        """Return copies of the cached results or None on a miss."""
+        if video_id and limit == 1:
+            cached = self._get(self.videos, video_id)
+            if cached:
+                self.stats["video_hits"] += 1
+                return [dict(cached[1])]
+        cached = self._get(self.queries, self.normalize(query, video_id))
+        # a shorter result list than asked for means the search had no more
+        if cached and (cached[1] >= limit or len(cached[2]) < cached[1]):
+            self.stats["query_hits"] += 1
+            return [dict(x) for x in cached[2][:limit]]
+        self.stats["misses"] += 1
+        return None
+
+    def store(self, query: str, limit: int, results: list, video_id: str = None):
+        if not results or Config.SEARCH_CACHE_SIZE <= 0:
+            return
+        self._set(self.queries, self.normalize(query, video_id), (limit, results))
+        for context in results:
+            self._set(self.videos, context["id"], (context,))
+
+    def format_stats(self) -> str:
+        hits = self.stats["query_hits"] + self.stats["video_hits"]
+        lookups = hits + self.stats["misses"]
+        ratio = round(hits / lookups * 100, 2) if lookups else 0
+        return (
+            "**🔍 Search Cache**\n\n"
+            f"**Queries:** `{len(self.queries)}` | **Videos:** `{len(self.videos)}`\n"
+            f"**Query Hits:** `{self.stats['query_hits']}` | **Video Hits:** `{self.stats['video_hits']}`\n"
+            f"**Misses:** `{self.stats['misses']}` | **Ratio:** `{ratio}%`"
+        )
+
+
+search_cache = SearchCache()
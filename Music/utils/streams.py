@@ -0,0 +1,96 @@
+import asyncio
+import time
+from collections import deque
+
+from config import Config
+from Music.core.logger import LOGS
+
+from .cache import media_cache
+from .queue import Queue
+from .transcode import transcoder
+from .youtube import ytube
+
+# ffmpeg input options for http sources, googlevideo drops long connections
+RECONNECT = "-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5"
+
+
+class Streamer:
+    """
+    Picks what a starting track streams from.
+
+    Cached tracks play from their file. With `Config.STREAM_MODE` on, the rest
+    play from their direct media url right away while the full download runs
+    in the background, so replays, seeks and the next plays find the file.
+    Tracks without a streamable format wait for the download as before.
+    Url starts can't share a decode (see `HellMusic.audio_stream`), a track
+    several chats stream gets its shared raw copy once the download is done.
+
+    Time to first audio (request to stream started) is kept per track.
+    """
+
+    def __init__(self):
+        self.enabled = Config.STREAM_MODE.lower() == "on"
+        self.background = set()
+        self.recent = deque(maxlen=10)  # (video_id, mode, seconds)
+        self.stats = {}  # mode -> {"count", "total", "max"}
+
+    def is_url(self, source: str) -> bool:
+        return str(source).startswith(("http://", "https://"))
+
+    def params(self, source: str, params: str = "") -> str:
+        if self.is_url(source):
+            return f"{RECONNECT} {params}".strip()
+        return params
+
+    async def source(self, video_id: str, video: bool = False) -> tuple:
+        """Return `(path or url, mode)`, mode is "cache", "download" or "stream"."""
+        if media_cache.find(video_id, video):
+            return await ytube.download(video_id, True, video), "cache"
+        if not self.enabled:
+            return await ytube.download(video_id, True, video), "download"
+        try:
+            url = await ytube.stream_url(video_id, True, video)
+        except Exception as e:
+            LOGS.warning(f"[Streamer] {video_id}: {e}")
+            url = None
+        if not url:
+            return await ytube.download(video_id, True, video), "download"
+        task = asyncio.ensure_future(self._download(video_id, video))
+        self.background.add(task)
+        task.add_done_callback(self.background.discard)
+        return url, "stream"
+
+    async def _download(self, video_id: str, video: bool):
+        try:
+            path = await ytube.download(video_id, True, video)
+            # chats that started from the url pick up the shared raw copy next time
+            if not video and len(Queue.playing(video_id)) > 1:
+                transcoder.schedule(path, force=True)
+        except Exception as e:
+            LOGS.warning(f"[Streamer] Background download of {video_id} failed: {e}")
+
+    def record(self, video_id: str, mode: str, started: float):
+        took = time.monotonic() - started
+        stats = self.stats.setdefault(mode, {"count": 0, "total": 0, "max": 0})
+        stats["count"] += 1
+        stats["total"] += took
+        stats["max"] = max(stats["max"], took)
+        self.recent.append((video_id, mode, took))
+
+    def format_stats(self) -> str:
+        text = f"**▶️ Time To First Audio** (stream mode `{'on' if self.enabled else 'off'}`)\n\n"
+        if not self.stats:
+            return text + "__No tracks started yet.__"
+        for mode, stats in self.stats.items():
+            avg = stats["total"] / stats["count"]
+            text += (
+                f"**{mode.title()}:** `{stats['count']}` | **Avg:** `{round(avg, 2)}s` "
+                f"| **Max:** `{round(stats['max'], 2)}s`\n"
+            )
+        text += "\n**Recent:**\n"
+        for video_id, mode, took in reversed(self.recent):
+            text += f"`{video_id}` __{mode}__ `{round(took, 2)}s`\n"
+        return text.strip()
+
+
+streamer = Streamer()
@@ -1,8 +1,17 @@
+import asyncio
 import os
-import requests
+from collections import OrderedDict
 from io import BytesIO
+
 from PIL import Image
-from youtubesearchpython import VideosSearch
+from youtubesearchpython.__future__ import VideosSearch
+
+from config import Config
+from Music.core.http import http_client
+from Music.core.logger import LOGS
+
+# best first
+RESOLUTIONS = ["maxresdefault", "hq720", "sddefault", "mqdefault", "default"]
 
 
 def extract_id(link: str) -> str:
@@ -18,57 +27,129 @@ def extract_id(link: str) -> str:
     return link
 
 
-def get_best_thumbnail(video_id: str) -> str:
-    """Try all YouTube thumbnail resolutions until one works."""
-    urls = [
-        f"https://i.ytimg.com/vi/{video_id}/maxresdefault.jpg",
-        f"https://i.ytimg.com/vi/{video_id}/hq720.jpg",
-        f"https://i.ytimg.com/vi/{video_id}/sddefault.jpg",
-        f"https://i.ytimg.com/vi/{video_id}/mqdefault.jpg",
-        f"https://i.ytimg.com/vi/{video_id}/default.jpg",
-    ]
-
-    for url in urls:
-        r = requests.get(url, stream=True)
-        if r.status_code == 200:
-            return url
-
-    raise Exception("No working thumbnail found.")
-
+def encode_thumb(content: bytes, path: str) -> str:
+    """Decode and re-encode as JPEG. Blocking, runs in an executor."""
+    img = Image.open(BytesIO(content)).convert("RGB")
+    img.save(f"{path}.part", "JPEG")
+    os.replace(f"{path}.part", path)
+    return path
 
-def download_thumb(video: str) -> str:
-    video = str(video).strip()
 
-    # If it's not a YouTube link or ID → treat as search query
-    if (
-        "youtu" not in video
-        and len(video) != 11
-        and not video.isnumeric()
-    ):
-        results = VideosSearch(video, limit=1).result().get("result", [])
+class Thumbnail:
+    """
+    Thumbnails are kept per video id in `Config.CACHE_DIR`, at most
+    `Config.THUMB_CACHE_SIZE` of them, least recently used removed first.
+    The url and search lookups are bounded the same way.
+    """
+
+    def __init__(self):
+        self.directory = Config.CACHE_DIR
+        self.limit = max(1, Config.THUMB_CACHE_SIZE)
+        self.files = OrderedDict()  # video_id -> thumbnail path, oldest first
+        self.best = OrderedDict()  # video_id -> best available thumbnail url
+        self.queries = OrderedDict()  # search query -> video_id
+        self.pending = {}  # video_id -> task generating its thumbnail
+        self.load()
+
+    def path(self, video_id: str) -> str:
+        return os.path.join(self.directory, f"thumb-{video_id}.jpg")
+
+    def load(self):
+        if not os.path.isdir(self.directory):
+            return
+        found = []
+        for name in os.listdir(self.directory):
+            if name.startswith("thumb-") and name.endswith(".jpg"):
+                path = os.path.join(self.directory, name)
+                found.append((os.path.getmtime(path), name[6:-4], path))
+        for _, video_id, path in sorted(found):
+            self.files[video_id] = path
+        self.trim()
+
+    def _remember(self, entries: OrderedDict, key: str, value: str):
+        entries[key] = value
+        entries.move_to_end(key)
+        while len(entries) > self.limit:
+            entries.popitem(last=False)
+
+    def trim(self):
+        # thumbnails still being generated are skipped, `_done` trims again
+        for video_id in list(self.files):
+            if len(self.files) <= self.limit:
+                break
+            if video_id in self.pending:
+                continue
+            path = self.files.pop(video_id)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _done(self, video_id: str):
+        self.pending.pop(video_id, None)
+        self.trim()
+
+    async def get_video_id(self, video: str) -> str:
+        # If it's not a YouTube link or ID → treat as search query
+        if "youtu" in video or len(video) == 11 or video.isnumeric():
+            return extract_id(video)
+        if video in self.queries:
+            self.queries.move_to_end(video)
+            return self.queries[video]
+        results = (await VideosSearch(video, limit=1).next()).get("result", [])
         if not results:
             raise Exception("No search results found.")
-        video_id = results[0]["id"]
-    else:
-        video_id = extract_id(video)
-
-    url = get_best_thumbnail(video_id)
-    response = requests.get(url, stream=True)
-    img = Image.open(BytesIO(response.content)).convert("RGB")
-
-    os.makedirs("cache", exist_ok=True)
-    path = f"cache/thumb-{video_id}.jpg"
-    img.save(path, "JPEG")
-
-    return path
-
-
-class thumb:
-    @staticmethod
-    def generate(video: str, *args, **kwargs) -> str:
-        """Bot-compatible wrapper"""
+        self._remember(self.queries, video, results[0]["id"])
+        return results[0]["id"]
+
+    async def get_best_thumbnail(self, video_id: str) -> str:
+        """Probe all YouTube thumbnail resolutions at once and keep the best one."""
+        if video_id in self.best:
+            self.best.move_to_end(video_id)
+            return self.best[video_id]
+        urls = [f"https://i.ytimg.com/vi/{video_id}/{res}.jpg" for res in RESOLUTIONS]
+        statuses = await asyncio.gather(
+            *[http_client.head(url, retries=0) for url in urls],
+            return_exceptions=True,
+        )
+        for url, status in zip(urls, statuses):
+            if status == 200:
+                self._remember(self.best, video_id, url)
+                return url
+        raise Exception("No working thumbnail found.")
+
+    async def download_thumb(self, video_id: str) -> str:
+        path = self.path(video_id)
+        if os.path.exists(path):
+            self.files[video_id] = path
+            self.files.move_to_end(video_id)
+            return path
+        url = await self.get_best_thumbnail(video_id)
+        status, content = await http_client.get(url, read="bytes")
+        if status != 200:
+            self.best.pop(video_id, None)
+            raise Exception(f"Thumbnail request failed with status {status}.")
+        os.makedirs(self.directory, exist_ok=True)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, encode_thumb, content, path)
+        self.files[video_id] = path
+        self.files.move_to_end(video_id)
+        self.trim()
+        return path
+
+    async def generate(self, video: str, *args, **kwargs) -> str:
+        """Return a cached thumbnail path for a video id, link or query. None on failure."""
         try:
-            return download_thumb(video)
+            video_id = await self.get_video_id(str(video).strip())
+            task = self.pending.get(video_id)
+            if task is None:
+                task = asyncio.ensure_future(self.download_thumb(video_id))
+                self.pending[video_id] = task
+                task.add_done_callback(lambda _: self._done(video_id))
+            return await asyncio.shield(task)
         except Exception as e:
-            print("Thumbnail Error:", e)
+            LOGS.warning(f"[Thumbnail] {e}")
             return None
+
+
+thumb = Thumbnail()
@@ -0,0 +1,144 @@
+import asyncio
+import os
+
+from pytgcalls.types.input_stream.quality import MediumQualityAudio
+
+from config import Config
+from Music.core.logger import LOGS
+
+from .cache import MediaCache, media_cache
+
+# ffmpeg conversions running at the same time
+WORKERS = 2
+
+
+class Transcoder:
+    """
+    Raw PCM copies of downloaded audio tracks, enabled by `Config.TRANSCODE_CACHE`.
+
+    pytgcalls plays raw s16le files without spawning the ffmpeg process every
+    piped stream needs. A track is converted once in the background after its
+    first play or prefetch, then later plays, replays and loops of it in any
+    chat stream the raw file. Seeks and resumed positions read it back through
+    ffmpeg, which is a plain copy with nothing to decode. Raw files live in
+    `<DWL_DIR>/raw` with their own LRU limit, `Config.RAW_CACHE_LIMIT`.
+
+    Tracks several chats play at once are converted even with the cache off,
+    see `HellMusic.audio_stream`.
+    """
+
+    def __init__(self):
+        self.enabled = Config.TRANSCODE_CACHE.lower() == "on"
+        self.quality = MediumQualityAudio()
+        self.cache = MediaCache(
+            os.path.join(Config.DWL_DIR, "raw"),
+            Config.RAW_CACHE_LIMIT,
+            "Raw Cache",
+            ("raw",),
+        )
+        self.semaphore = asyncio.Semaphore(WORKERS)
+        self.tasks = {}  # video_id -> conversion task
+        # ffmpeg input options to read a raw copy back, for seeks
+        self.input_params = f"-f s16le -ar {self.quality.bitrate} -ac {self.quality.channels}"
+        self.stats = {
+            "converted": 0,
+            "failed": 0,
+            "shared": 0,
+        }
+
+    def video_id(self, file: str):
+        # only cached downloads are named after their video id
+        if not media_cache.is_cached(file):
+            return None
+        return self.cache._video_id(file)
+
+    def get(self, file: str):
+        """Return the raw copy of a cached download, scheduling it on a miss."""
+        video_id = self.video_id(file)
+        if video_id is None:
+            return None
+        raw = self.cache.lookup(video_id)
+        if raw is None:
+            self.schedule(file)
+        return raw
+
+    async def shared(self, file: str, timeout: float):
+        """
+        Raw copy of a track several chats play at once, converted even with
+        the cache off. A conversion already running is waited on for up to
+        `timeout` seconds, one started here only serves the next starts.
+        """
+        video_id = self.video_id(file)
+        if video_id is None:
+            return None
+        task = self.tasks.get(video_id)
+        if task is None:
+            raw = self.cache.lookup(video_id)
+            if raw is None:
+                self.schedule(file, force=True)
+                return None
+        else:
+            try:
+                await asyncio.wait_for(asyncio.shield(task), timeout)
+            except Exception:
+                return None
+            raw = self.cache.lookup(video_id)
+        if raw:
+            self.stats["shared"] += 1
+        return raw
+
+    def schedule(self, file: str, force: bool = False):
+        video_id = self.video_id(file)
+        if video_id is None or not (self.enabled or force):
+            return
+        if video_id in self.tasks or self.cache.find(video_id):
+            return
+        task = asyncio.ensure_future(self._convert(file, video_id))
+        self.tasks[video_id] = task
+        task.add_done_callback(lambda _: self.tasks.pop(video_id, None))
+
+    async def _convert(self, file: str, video_id: str):
+        os.makedirs(self.cache.directory, exist_ok=True)
+        path = os.path.join(self.cache.directory, f"{video_id}.raw")
+        part = f"{path}.part"
+        async with self.semaphore:
+            process = await asyncio.create_subprocess_exec(
+                "ffmpeg", "-y", "-nostdin", "-loglevel", "error",
+                "-i", file,
+                "-f", "s16le",
+                "-ac", str(self.quality.channels),
+                "-ar", str(self.quality.bitrate),
+                part,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            try:
+                _, error = await process.communicate()
+            finally:
+                if process.returncode is None:
+                    process.kill()
+        if process.returncode != 0:
+            self.stats["failed"] += 1
+            LOGS.warning(f"[Transcoder] {video_id}: {error.decode(errors='ignore').strip()}")
+            try:
+                os.remove(part)
+            except OSError:
+                pass
+            return
+        os.replace(part, path)
+        self.cache.add(path)
+        self.stats["converted"] += 1
+
+    def format_stats(self) -> str:
+        text = (
+            f"{self.cache.format_stats()}\n"
+            f"**Transcode Cache:** `{'on' if self.enabled else 'off'}` | **Running:** `{len(self.tasks)}`\n"
+            f"**Converted:** `{self.stats['converted']}` | **Failed:** `{self.stats['failed']}` "
+            f"| **Shared Starts:** `{self.stats['shared']}`"
+        )
+        if Config.STREAM_MODE.lower() == "on":
+            text += "\n__Stream mode is on: tracks starting from a url decode per chat, fan-out applies from their next start.__"
+        return text
+
+
+transcoder = Transcoder()
@@ -0,0 +1,99 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from config import Config
+from Music.core.logger import LOGS
+
+
+class WorkerPool:
+    """
+    Bounded thread pool for blocking work (yt-dlp extraction and downloads).
+
+    Every job function is called as `func(cancel, *args)` in a worker thread,
+    where `cancel` is a `threading.Event` set when the job is cancelled.
+    Jobs that have not started yet are dropped, running ones are expected to
+    check the event (yt-dlp does it from a progress hook).
+    """
+
+    def __init__(self, workers: int, name: str):
+        self.name = name
+        self.workers = max(1, workers)
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix=name
+        )
+        self.jobs = {}
+        self.lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.stats = {
+            "done": 0,
+            "failed": 0,
+            "cancelled": 0,
+            "peak_queue": 0,
+        }
+
+    def _call(self, cancel: threading.Event, func, args):
+        with self.lock:
+            self.queued -= 1
+            self.running += 1
+        try:
+            if cancel.is_set():
+                raise asyncio.CancelledError()
+            return func(cancel, *args)
+        finally:
+            with self.lock:
+                self.running -= 1
+
+    async def run(self, func, *args, key=None):
+        cancel = threading.Event()
+        with self.lock:
+            self.queued += 1
+            self.stats["peak_queue"] = max(self.stats["peak_queue"], self.queued)
+        job = self.executor.submit(self._call, cancel, func, args)
+        future = asyncio.wrap_future(job)
+        if key is not None:
+            self.jobs[key] = (future, job, cancel)
+        try:
+            result = await future
+            self.stats["done"] += 1
+            return result
+        except asyncio.CancelledError:
+            cancel.set()
+            if job.cancelled():
+                # never reached a worker thread
+                with self.lock:
+                    self.queued -= 1
+            self.stats["cancelled"] += 1
+            raise
+        except Exception:
+            if cancel.is_set():
+                self.stats["cancelled"] += 1
+            else:
+                self.stats["failed"] += 1
+            raise
+        finally:
+            if key is not None and self.jobs.get(key, (None,))[0] is future:
+                self.jobs.pop(key, None)
+
+    def cancel(self, key) -> bool:
+        job = self.jobs.get(key)
+        if not job:
+            return False
+        future, _, cancel = job
+        cancel.set()
+        future.cancel()
+        LOGS.info(f"[{self.name}] Cancelled job: {key}")
+        return True
+
+    def format_stats(self) -> str:
+        return (
+            f"**⚙️ Workers ({self.name})**\n\n"
+            f"**Running:** `{self.running}/{self.workers}`\n"
+            f"**Queued:** `{self.queued}` | **Peak:** `{self.stats['peak_queue']}`\n"
+            f"**Done:** `{self.stats['done']}` | **Failed:** `{self.stats['failed']}` "
+            f"| **Cancelled:** `{self.stats['cancelled']}`"
+        )
+
+
+ytdlp_pool = WorkerPool(Config.YTDLP_WORKERS, "yt-dlp")
@@ -3,7 +3,6 @@ import re
 import time
 import asyncio
 
-import requests
 import yt_dlp
 import aiohttp
 from lyricsgenius import Genius
@@ -12,9 +11,21 @@ from youtubesearchpython.__future__ import VideosSearch
 
 from config import Config
 from Music.core.clients import hellbot
+from Music.core.http import http_client
 from Music.core.logger import LOGS
+from Music.helpers.formatters import formatter
 from Music.helpers.strings import TEXTS
 
+from .cache import media_cache
+from .search import search_cache
+from .workers import ytdlp_pool
+
+# formats `stream_url` accepts, segmented (dash/hls) ones are left to the full download
+STREAM_FORMATS = {
+    "audio": "bestaudio[protocol^=http][protocol!*=dash]",
+    "video": "best[height<=?720][acodec!=none][vcodec!=none][protocol^=http][protocol!*=dash]",
+}
+
 
 # ==========================================
 #  GLOBAL DOWNLOAD STATS (IN-MEMORY ONLY)
@@ -83,62 +94,53 @@ async def download_song_api(link: str):
     video_id = _extract_video_id(link)
     download_folder = "downloads"
 
-    # Cache
-    for ext in ("mp3", "m4a", "webm"):
-        file_path = os.path.join(download_folder, f"{video_id}.{ext}")
-        if os.path.exists(file_path):
-            return file_path
-
     song_url = f"{Config.API_URL}/song/{video_id}?api={Config.API_KEY}"
 
     timeout = aiohttp.ClientTimeout(total=30)
-    async with aiohttp.ClientSession(timeout=timeout) as session:
-        data = None
-
-        for _ in range(5):
-            try:
-                async with session.get(song_url) as resp:
-                    if resp.status != 200:
-                        return None
+    data = None
 
-                    data = await resp.json()
-                    status = (data.get("status") or "").lower()
+    for _ in range(5):
+        try:
+            status, data = await http_client.get(song_url, timeout=timeout)
+            if status != 200:
+                return None
 
-                    if status == "done":
-                        if not data.get("link"):
-                            return None
-                        break
+            status = (data.get("status") or "").lower()
 
-                    elif status == "downloading":
-                        await asyncio.sleep(4)
+            if status == "done":
+                if not data.get("link"):
+                    return None
+                break
 
-                    else:
-                        return None
+            elif status == "downloading":
+                await asyncio.sleep(4)
 
-            except Exception:
+            else:
                 return None
 
-        else:
+        except Exception:
             return None
 
-        # Download final file
-        try:
-            fmt = (data.get("format") or "mp3").lower()
-            os.makedirs(download_folder, exist_ok=True)
-            file_path = os.path.join(download_folder, f"{video_id}.{fmt}")
-
-            async with session.get(data["link"]) as file_resp:
-                with open(file_path, "wb") as f:
-                    while True:
-                        chunk = await file_resp.content.read(8192)
-                        if not chunk:
-                            break
-                        f.write(chunk)
+    else:
+        return None
 
-            return file_path
+    # Download final file
+    try:
+        fmt = (data.get("format") or "mp3").lower()
+        os.makedirs(download_folder, exist_ok=True)
+        file_path = os.path.join(download_folder, f"{video_id}.{fmt}")
 
-        except Exception:
+        # write to a .part file so readers never see a half written track
+        if not await http_client.download(
+            data["link"], f"{file_path}.part", timeout=timeout
+        ):
             return None
+        os.replace(f"{file_path}.part", file_path)
+
+        return file_path
+
+    except Exception:
+        return None
 
 
 async def download_video_api(link: str):
@@ -151,61 +153,52 @@ async def download_video_api(link: str):
     video_id = _extract_video_id(link)
     download_folder = "downloads"
 
-    # Cache
-    for ext in ("mp4", "webm", "mkv"):
-        file_path = os.path.join(download_folder, f"{video_id}.{ext}")
-        if os.path.exists(file_path):
-            return file_path
-
     video_url = f"{Config.VIDEO_API_URL}/video/{video_id}?api={Config.API_KEY}"
 
     timeout = aiohttp.ClientTimeout(total=45)
-    async with aiohttp.ClientSession(timeout=timeout) as session:
-        data = None
-
-        for _ in range(5):
-            try:
-                async with session.get(video_url) as resp:
-                    if resp.status != 200:
-                        return None
+    data = None
 
-                    data = await resp.json()
-                    status = (data.get("status") or "").lower()
+    for _ in range(5):
+        try:
+            status, data = await http_client.get(video_url, timeout=timeout)
+            if status != 200:
+                return None
 
-                    if status == "done":
-                        if not data.get("link"):
-                            return None
-                        break
+            status = (data.get("status") or "").lower()
 
-                    elif status == "downloading":
-                        await asyncio.sleep(8)
+            if status == "done":
+                if not data.get("link"):
+                    return None
+                break
 
-                    else:
-                        return None
+            elif status == "downloading":
+                await asyncio.sleep(8)
 
-            except Exception:
+            else:
                 return None
 
-        else:
+        except Exception:
             return None
 
-        try:
-            fmt = (data.get("format") or "mp4").lower()
-            os.makedirs(download_folder, exist_ok=True)
-            file_path = os.path.join(download_folder, f"{video_id}.{fmt}")
-
-            async with session.get(data["link"]) as file_resp:
-                with open(file_path, "wb") as f:
-                    while True:
-                        chunk = await file_resp.content.read(8192)
-                        if not chunk:
-                            break
-                        f.write(chunk)
+    else:
+        return None
 
-            return file_path
+    try:
+        fmt = (data.get("format") or "mp4").lower()
+        os.makedirs(download_folder, exist_ok=True)
+        file_path = os.path.join(download_folder, f"{video_id}.{fmt}")
 
-        except Exception:
+        # write to a .part file so readers never see a half written track
+        if not await http_client.download(
+            data["link"], f"{file_path}.part", timeout=timeout
+        ):
             return None
+        os.replace(f"{file_path}.part", file_path)
+
+        return file_path
+
+    except Exception:
+        return None
 
 
 class YouTube:
@@ -266,6 +259,10 @@ class YouTube:
         else:
             LOGS.warning("[YTDLP] cookies/cookies.txt not found. Running without cookies.")
 
+        # in-flight downloads, keyed by (video_id, media)
+        self.inflight = {}
+        self.waiters = {}  # key -> set of tasks awaiting the download
+
         # Lyrics
         self.lyrics = Config.LYRICS_API
         try:
@@ -290,6 +287,16 @@ class YouTube:
 
     async def get_data(self, link: str, video_id: bool, limit: int = 1) -> list:
         yt_url = await self.format_link(link, video_id)
+        vid = _extract_video_id(yt_url) if video_id or self.check(yt_url) else None
+        cached = search_cache.lookup(yt_url, limit, vid)
+        if cached is not None:
+            return cached
+        # the same query searched concurrently goes out once
+        key = ("search", search_cache.normalize(yt_url, vid), limit)
+        collection = await self.single_flight(key, self._search, yt_url, limit, vid)
+        return [dict(x) for x in collection]
+
+    async def _search(self, yt_url: str, limit: int, vid: str = None) -> list:
         collection = []
         results = VideosSearch(yt_url, limit=limit)
 
@@ -310,14 +317,152 @@ class YouTube:
             }
             collection.append(context)
 
+        search_cache.store(yt_url, limit, collection[:limit], vid)
         return collection[:limit]
 
+    def _cancellable(self, opts: dict, cancel) -> dict:
+        # yt-dlp calls progress hooks from the worker thread, raising there aborts the job
+        def hook(_):
+            if cancel.is_set():
+                raise yt_dlp.utils.DownloadCancelled()
+
+        return {**opts, "progress_hooks": [hook]}
+
+    def _ytdlp_playlist(self, cancel, link: str) -> list:
+        with yt_dlp.YoutubeDL({"extract_flat": True}) as ydl:
+            results = ydl.extract_info(link, False)
+        # flat entries already carry the title and duration, keep them for resolve_many
+        return [
+            {
+                "id": video["id"],
+                "title": video.get("title"),
+                "duration": formatter.secs_to_mins(int(video["duration"]))
+                if video.get("duration")
+                else None,
+            }
+            for video in results["entries"]
+        ]
+
+    def _ytdlp_download(self, cancel, opts: dict, link: str) -> str:
+        dlp = yt_dlp.YoutubeDL(self._cancellable(opts, cancel))
+        info = dlp.extract_info(link, download=False)
+        path = os.path.join("downloads", f"{info['id']}.{info['ext']}")
+        if not os.path.exists(path) and not cancel.is_set():
+            dlp.download([link])
+        return path
+
+    def _ytdlp_stream_url(self, cancel, link: str, video: bool) -> str:
+        # a single progressive http format ffmpeg can read while it downloads
+        opts = {
+            "format": STREAM_FORMATS["video" if video else "audio"],
+            "geo_bypass": True,
+            "nocheckcertificate": True,
+            "quiet": True,
+            "no_warnings": True,
+        }
+        if "cookiefile" in self.yt_opts_audio:
+            opts["cookiefile"] = self.yt_opts_audio["cookiefile"]
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            info = ydl.extract_info(link, download=False)
+        if info.get("is_live"):
+            return None
+        return info.get("url")
+
+    def _ytdlp_song(self, cancel, opts: dict, link: str, video: bool) -> str:
+        dlp = yt_dlp.YoutubeDL(self._cancellable(opts, cancel))
+        yt_file = dlp.extract_info(link, download=True)
+        if video:
+            return f"{yt_file['id']}.mp4"
+        return dlp.prepare_filename(yt_file)
+
     async def get_playlist(self, link: str) -> list:
         yt_url = await self.format_link(link, False)
-        with yt_dlp.YoutubeDL({"extract_flat": True}) as ydl:
-            results = ydl.extract_info(yt_url, False)
-            playlist = [video["id"] for video in results["entries"]]
-        return playlist
+        return await ytdlp_pool.run(self._ytdlp_playlist, yt_url)
+
+    async def resolve_many(self, items: list):
+        """
+        Yield the `get_data` details of many video ids (or partial dicts) in order,
+        None for the ones that failed. Items that already have a title and a
+        duration skip the search, the rest resolve concurrently, at most
+        `Config.RESOLVE_WORKERS` at a time.
+        """
+        semaphore = asyncio.Semaphore(max(1, Config.RESOLVE_WORKERS))
+
+        async def resolve(item):
+            if isinstance(item, dict):
+                if item.get("title") and item.get("duration"):
+                    return {"id": item["id"], "title": item["title"], "duration": item["duration"]}
+                item = item["id"]
+            async with semaphore:
+                return (await self.get_data(item, True, 1))[0]
+
+        tasks = [asyncio.ensure_future(resolve(item)) for item in items]
+        try:
+            for task in tasks:
+                try:
+                    yield await task
+                except Exception as e:
+                    LOGS.error(f"[Resolve] {e}")
+                    yield None
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def single_flight(self, key: tuple, func, *args):
+        """
+        Run `func(*args)` once per key.
+        Concurrent callers with the same key await the same task, and a
+        cancelled caller does not cancel the shared download.
+        """
+        task = self.inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func(*args))
+            self.inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        waiter = asyncio.current_task()
+        self.waiters.setdefault(key, set()).add(waiter)
+        try:
+            return await asyncio.shield(task)
+        finally:
+            waiters = self.waiters.get(key)
+            if waiters is not None:
+                waiters.discard(waiter)
+                if not waiters:
+                    del self.waiters[key]
+
+    def _forget(self, key: tuple, task: asyncio.Task):
+        if self.inflight.get(key) is task:
+            del self.inflight[key]
+
+    def cancel(self, video_id: str, video: bool, owner: asyncio.Task) -> bool:
+        """
+        Stop an in-flight download when `owner` is the only task waiting on it.
+        Anyone else waiting, or about to, keeps it running.
+        """
+        key = (video_id, "video" if video else "audio")
+        task = self.inflight.get(key)
+        if task is None or self.waiters.get(key) != {owner}:
+            return False
+        # callers arriving from now on start a fresh download
+        del self.inflight[key]
+        task.cancel()
+        return True
+
+    async def stream_url(self, link: str, video_id: bool, video: bool = False) -> str:
+        """Direct media url of a track or None when it has no streamable format."""
+        yt_url = await self.format_link(link, video_id)
+        key = (_extract_video_id(yt_url), "video_url" if video else "audio_url")
+        return await self.single_flight(
+            key, ytdlp_pool.run, self._ytdlp_stream_url, yt_url, video
+        )
+
+    async def download_api(self, link: str, video: bool = False):
+        video_id = _extract_video_id(link)
+        if video:
+            key = (video_id, "video_api")
+            return await self.single_flight(key, download_video_api, link)
+        key = (video_id, "audio_api")
+        return await self.single_flight(key, download_song_api, link)
 
     async def download(self, link: str, video_id: bool, video: bool = False) -> str:
         """
@@ -327,49 +472,51 @@ class YouTube:
             - Never returns None
             - Uses API → fallback to yt-dlp
             - Tracks YT-DLP failures accurately
+            - Concurrent requests for one track share a single download
         """
         yt_url = await self.format_link(link, video_id)
         media = "video" if video else "audio"
         DOWNLOAD_STATS[f"{media}_total"] += 1
 
+        # Serve repeated tracks from the media cache
+        vid = _extract_video_id(yt_url)
+        cached = media_cache.lookup(vid, video)
+        if cached:
+            DOWNLOAD_STATS[f"{media}_success"] += 1
+            return cached
+
+        try:
+            path = await self.single_flight((vid, media), self._download, yt_url, video)
+        except Exception as e:
+            DOWNLOAD_STATS[f"{media}_failed_ytdlp"] += 1
+            LOGS.error(f"[YT-DLP {media}] {e}")
+            raise
+
+        DOWNLOAD_STATS[f"{media}_success"] += 1
+        return path
+
+    async def _download(self, yt_url: str, video: bool) -> str:
         # Try API first (if available)
         api_path = None
         try:
-            if video:
-                api_path = await download_video_api(yt_url)
-            else:
-                api_path = await download_song_api(yt_url)
+            api_path = await self.download_api(yt_url, video)
         except:
             api_path = None
 
         if api_path and os.path.exists(api_path):
-            DOWNLOAD_STATS[f"{media}_success"] += 1
+            media_cache.add(api_path)
             return api_path
 
-        # Fallback: YT-DLP
-        try:
-            if video:
-                dlp = yt_dlp.YoutubeDL(self.yt_opts_video)
-            else:
-                dlp = yt_dlp.YoutubeDL(self.yt_opts_audio)
+        # Fallback: YT-DLP, off the event loop
+        opts = self.yt_opts_video if video else self.yt_opts_audio
+        key = (_extract_video_id(yt_url), "video" if video else "audio")
+        path = await ytdlp_pool.run(self._ytdlp_download, opts, yt_url, key=key)
 
-            info = dlp.extract_info(yt_url, download=False)
-            path = os.path.join("downloads", f"{info['id']}.{info['ext']}")
+        if not os.path.exists(path):
+            raise Exception("YT-DLP failed to download file.")
 
-            if not os.path.exists(path):
-                dlp.download([yt_url])
-
-            if not os.path.exists(path):
-                DOWNLOAD_STATS[f"{media}_failed_ytdlp"] += 1
-                raise Exception("YT-DLP failed to download file.")
-
-            DOWNLOAD_STATS[f"{media}_success"] += 1
-            return path
-
-        except Exception as e:
-            DOWNLOAD_STATS[f"{media}_failed_ytdlp"] += 1
-            LOGS.error(f"[YT-DLP {media}] {e}")
-            raise
+        media_cache.add(path)
+        return path
 
     async def send_song(
         self, message: CallbackQuery, rand_key: str, key: int, video: bool = False
@@ -390,30 +537,22 @@ class YouTube:
 
         try:
             thumb = f"{track['id']}{time.time()}.jpg"
-            _thumb = requests.get(track["thumbnail"], allow_redirects=True)
-            open(thumb, "wb").write(_thumb.content)
+            if not await http_client.download(track["thumbnail"], thumb):
+                thumb = None
 
-            # Try API
-            if video:
-                output = await download_video_api(link)
-            else:
-                output = await download_song_api(link)
+            # Try cache, then API
+            output = media_cache.lookup(track["id"], video)
+            if not output:
+                output = await self.download_api(link, video)
+                if output and os.path.exists(output):
+                    media_cache.add(output)
 
             if output and os.path.exists(output):
                 success = True
             else:
                 # Fallback YT-DLP
-                if video:
-                    dlp = yt_dlp.YoutubeDL(self.video_opts)
-                else:
-                    dlp = yt_dlp.YoutubeDL(self.audio_opts)
-
-                yt_file = dlp.extract_info(link, download=True)
-
-                if video:
-                    output = f"{yt_file['id']}.mp4"
-                else:
-                    output = dlp.prepare_filename(yt_file)
+                opts = self.video_opts if video else self.audio_opts
+                output = await ytdlp_pool.run(self._ytdlp_song, opts, link, video)
 
                 success = True
 
@@ -468,9 +607,13 @@ class YouTube:
             Config.SONG_CACHE.pop(rand_key, None)
 
             try:
-                if "thumb" in locals() and os.path.exists(thumb):
+                if "thumb" in locals() and thumb and os.path.exists(thumb):
                     os.remove(thumb)
-                if output and os.path.exists(output):
+                if (
+                    output
+                    and os.path.exists(output)
+                    and not media_cache.is_cached(output)
+                ):
                     os.remove(output)
             except:
                 pass
@@ -19,19 +19,42 @@ class Config(object):
 
     
     # optional config variables
+    ADMIN_CACHE_TTL = int(getenv("ADMIN_CACHE_TTL", 600))  # seconds to trust cached admin and auth lists
     BLACK_IMG = getenv("BLACK_IMG", "https://files.catbox.moe/jwc4b6.jpg")        # black image for progress
     BOT_NAME = getenv("BOT_NAME", "Arc Music")   # dont put fancy texts here.
     BOT_PIC = getenv("BOT_PIC", "https://files.catbox.moe/b64xz8.jpg")           # put direct link to image here
+    COUNTER_FLUSH = int(getenv("COUNTER_FLUSH", 5))     # seconds between play counter writes to the database
+    DWL_CACHE_LIMIT = int(getenv("DWL_CACHE_LIMIT", 2147483648))  # size in bytes of downloads kept for reuse. 0 for no limit
+    FANOUT_WAIT = int(getenv("FANOUT_WAIT", 5))         # seconds a chat waits for a running shared decode of a track other chats play. 0 to disable. url starts (STREAM_MODE) join it from their next start
+    FAVS_CACHE_SIZE = int(getenv("FAVS_CACHE_SIZE", 1000))  # users whose favorites are kept in memory
+    HTTP_PER_HOST = int(getenv("HTTP_PER_HOST", 20))   # max open connections to a single host
+    HTTP_POOL_SIZE = int(getenv("HTTP_POOL_SIZE", 100))  # max open http connections in total
     LEADERBOARD_TIME = getenv("LEADERBOARD_TIME", "8:00")   # time in 24hr format for leaderboard broadcast
     LYRICS_API = getenv("LYRICS_API", None)             # from https://docs.genius.com/
     MAX_FAVORITES = int(getenv("MAX_FAVORITES", 30))    # max number of favorite tracks
+    PEER_CACHE_SIZE = int(getenv("PEER_CACHE_SIZE", 5000))  # chat titles and user mentions kept in memory
+    PEER_CACHE_TTL = int(getenv("PEER_CACHE_TTL", 3600))    # seconds to trust a cached chat title or user mention
+    PERSIST_QUEUES = getenv("PERSIST_QUEUES", "on")     # "on" or "off" to save queues and resume them after a restart
     PLAY_LIMIT = int(getenv("PLAY_LIMIT", 0))           # time in minutes. 0 for no limit
+    PREFETCH_COUNT = int(getenv("PREFETCH_COUNT", 2))   # upcoming queue tracks to download in background. 0 to disable
     PRIVATE_MODE = getenv("PRIVATE_MODE", "off")        # "on" or "off" to enable/disable private mode
+    RAW_CACHE_LIMIT = int(getenv("RAW_CACHE_LIMIT", 2147483648))  # size in bytes of raw audio kept by TRANSCODE_CACHE. 0 for no limit
+    RESOLVE_WORKERS = int(getenv("RESOLVE_WORKERS", 8)) # playlist and favorites tracks looked up at the same time
+    RESUME_POSITION = getenv("RESUME_POSITION", "on")   # "on" to resume restored tracks where they stopped, "off" to start them over
+    SEARCH_CACHE_SIZE = int(getenv("SEARCH_CACHE_SIZE", 2000))  # searches and video details kept in memory. 0 to disable
+    SEARCH_CACHE_TTL = int(getenv("SEARCH_CACHE_TTL", 3600))    # seconds to trust a cached search result
+    SHARDS = int(getenv("SHARDS", 1))                   # worker processes to split the chats over behind one front bot process, each needs its own HELLBOT_SESSION
+    SHARD_SYNC = int(getenv("SHARD_SYNC", 30))          # seconds between shard workers reloading sudo, ban and favorite lists
     SONG_LIMIT = int(getenv("SONG_LIMIT", 0))           # time in minutes. 0 for no limit
+    STATE_FLUSH = int(getenv("STATE_FLUSH", 10))        # seconds between queue state writes to the database
+    STREAM_MODE = getenv("STREAM_MODE", "off")          # "on" to start youtube tracks from their media url while they download, costs an extra url extraction per uncached track
     TELEGRAM_IMG = getenv("TELEGRAM_IMG", "https://files.catbox.moe/20hvch.jpg")         # put direct link to image here
     TG_AUDIO_SIZE_LIMIT = int(getenv("TG_AUDIO_SIZE_LIMIT", 104857600))     # size in bytes. 0 for no limit
     TG_VIDEO_SIZE_LIMIT = int(getenv("TG_VIDEO_SIZE_LIMIT", 1073741824))    # size in bytes. 0 for no limit
+    THUMB_CACHE_SIZE = int(getenv("THUMB_CACHE_SIZE", 500))  # thumbnails kept on disk and in memory
+    TRANSCODE_CACHE = getenv("TRANSCODE_CACHE", "off")  # "on" to keep raw copies of played tracks so replays skip ffmpeg decoding
     TZ = getenv("TZ", "Asia/Kolkata")   # https://en.wikipedia.org/wiki/List_of_tz_database_time_zones
+    YTDLP_WORKERS = int(getenv("YTDLP_WORKERS", 4))    # max yt-dlp jobs running at the same time
 
     # String Sessions
     HELLBOT_SESSION = getenv("HELLBOT_SESSION", None)